@@ -6,6 +6,9 @@ from both ends of a sequence.
 """
 
 from collections import deque
+from array import array
+import random
+import tracemalloc
 
 # ============================================================================
 # 1. CREATING A DEQUE
@@ -315,6 +318,136 @@ print(f"  BFS from 'A': {bfs(graph, 'A')}")
 print()  # Empty line
 
 
+# ============================================================================
+# 13. COMPACT CSR GRAPH WITH MULTI-SOURCE BFS
+# ============================================================================
+print("=" * 60)
+print("13. COMPACT CSR GRAPH WITH MULTI-SOURCE BFS")
+print("=" * 60)
+
+class CSRGraph:
+    """Directed graph in compressed-sparse-row form.
+
+    Node i's neighbors are ``targets[offsets[i]:offsets[i + 1]]``; both
+    are ``array('i')``, so each edge costs 4 bytes instead of a list slot
+    plus a boxed object. BFS marks visited nodes in a ``bytearray`` and
+    uses a preallocated array as its queue (every node is enqueued at
+    most once, so a head index replaces deque.popleft()).
+    """
+    
+    def __init__(self, offsets, targets, names=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.names = names  # Optional list mapping node id -> label
+        self.index = {name: i for i, name in enumerate(names)} if names else None
+    
+    @classmethod
+    def from_adjacency(cls, graph):
+        """Build from the dict-of-lists form used by bfs()"""
+        names = list(graph)
+        seen = set(names)
+        for neighbors in graph.values():
+            for node in neighbors:
+                if node not in seen:
+                    seen.add(node)
+                    names.append(node)
+        index = {name: i for i, name in enumerate(names)}
+        offsets = array('i', [0])
+        targets = array('i')
+        for name in names:
+            targets.extend(index[node] for node in graph.get(name, ()))
+            offsets.append(len(targets))
+        # Integer graphs with ids 0..n-1 don't need a label table
+        identity = all(type(name) is int and name == i for i, name in enumerate(names))
+        return cls(offsets, targets, None if identity else names)
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def _id(self, node):
+        return self.index[node] if self.index is not None else node
+    
+    def _label(self, i):
+        return self.names[i] if self.names is not None else i
+    
+    def _search(self, sources, distances=None):
+        """Core BFS from one or more sources; returns visit order (ids)"""
+        n = len(self)
+        offsets, targets = self.offsets, self.targets
+        visited = bytearray(n)
+        queue = array('i', bytes(4 * n))
+        tail = 0
+        for source in sources:
+            if not visited[source]:
+                visited[source] = 1
+                queue[tail] = source
+                tail += 1
+                if distances is not None:
+                    distances[source] = 0
+        head = 0
+        while head < tail:
+            node = queue[head]
+            head += 1
+            for neighbor in targets[offsets[node]:offsets[node + 1]]:
+                if not visited[neighbor]:
+                    visited[neighbor] = 1
+                    queue[tail] = neighbor
+                    tail += 1
+                    if distances is not None:
+                        distances[neighbor] = distances[node] + 1
+        return queue[:tail]
+    
+    def bfs(self, start):
+        """Nodes in BFS order from start (same result as bfs())"""
+        return [self._label(i) for i in self._search([self._id(start)])]
+    
+    def multi_source_distances(self, sources):
+        """Hop distance from the nearest source to every node (-1 = unreachable)"""
+        distances = array('i', [-1]) * len(self)
+        self._search([self._id(s) for s in sources], distances)
+        return distances
+    
+    def shortest_hops(self, source, target):
+        """Number of edges on a shortest path, or -1 if unreachable"""
+        return self.multi_source_distances([source])[self._id(target)]
+
+csr = CSRGraph.from_adjacency(graph)
+print(f"  Offsets: {csr.offsets.tolist()}")
+print(f"  Targets: {csr.targets.tolist()}")
+print(f"  CSR BFS from 'A': {csr.bfs('A')}")
+distances = csr.multi_source_distances(['B', 'C'])
+print(f"  Hops from nearest of B/C: { {csr.names[i]: d for i, d in enumerate(distances)} }")
+print(f"  Shortest hops A -> F: {csr.shortest_hops('A', 'F')}")
+
+# Benchmark on a random graph: 200,000 nodes, 4 edges each
+def traced(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+num_nodes = 200_000
+rng = random.Random(1)
+big_graph, dict_bytes = traced(
+    lambda: {i: [rng.randrange(num_nodes) for _ in range(4)] for i in range(num_nodes)})
+big_csr, csr_bytes = traced(lambda: CSRGraph.from_adjacency(big_graph))
+
+start = time.perf_counter()
+dict_order = bfs(big_graph, 0)
+dict_time = time.perf_counter() - start
+start = time.perf_counter()
+csr_order = big_csr.bfs(0)
+csr_time = time.perf_counter() - start
+
+print(f"\n  {num_nodes:,} nodes, {len(big_csr.targets):,} edges:")
+print(f"    dict of lists: {dict_bytes / 1024 / 1024:6.1f} MB, BFS {dict_time * 1000:6.0f} ms")
+print(f"    CSRGraph:      {csr_bytes / 1024 / 1024:6.1f} MB, BFS {csr_time * 1000:6.0f} ms")
+print(f"    Same visit order: {dict_order == csr_order}")
+
+print()  # Empty line
+
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
@@ -329,5 +462,6 @@ print("  - Can be used as queue (FIFO) or stack (LIFO)")
 print("  - rotate() rotates elements")
 print("  - maxlen creates bounded deque")
 print("  - Much faster than list for queue operations")
+print("  - For huge graphs, CSR arrays + bytearray visited maps save memory")
 print("=" * 60)
 
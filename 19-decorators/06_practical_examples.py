@@ -4,8 +4,19 @@ Practical Decorator Examples
 This file demonstrates real-world decorator patterns and use cases.
 """
 
-from functools import wraps
+from collections import OrderedDict, defaultdict, namedtuple
+from functools import lru_cache, wraps
+import asyncio
+import hashlib
+import inspect
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
 import time
+import timeit
 import logging
 
 # ============================================================================
@@ -105,16 +116,93 @@ print("=" * 60)
 print("4. RATE LIMITING DECORATOR")
 print("=" * 60)
 
-def rate_limit(max_calls=3, period=1):
+class TokenBucket:
+    """Thread-safe O(1) token bucket usable from threads and from asyncio.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``
+    (the allowed burst, default ``rate``). ``acquire`` reserves its tokens
+    under the lock, letting the balance go negative, and then sleeps
+    *outside* the lock for exactly as long as the debt takes to refill,
+    so callers are served in the order they reserved. A caller that is
+    cancelled or interrupted while waiting gives its tokens back.
+    """
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def _check(self, n):
+        if n > self.capacity:
+            raise ValueError(f"Cannot acquire {n} tokens; capacity is {self.capacity}")
+    
+    def _reserve(self, n):
+        """Take n tokens (possibly into debt); return seconds to wait"""
+        self._check(n)
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= n
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+    
+    def _refund(self, n):
+        """Give back tokens reserved by a caller that stopped waiting"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + n)
+    
+    def try_acquire(self, n=1):
+        """Take n tokens if available right now; never blocks"""
+        self._check(n)
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= n:
+                self.tokens -= n
+                return True
+            return False
+    
+    def acquire(self, n=1):
+        """Block the calling thread until n tokens are granted.
+        Returns the number of seconds waited."""
+        wait = self._reserve(n)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            except BaseException:
+                self._refund(n)
+                raise
+        return wait
+    
+    async def acquire_async(self, n=1):
+        """Asyncio front-end: yields to the event loop instead of blocking"""
+        wait = self._reserve(n)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._refund(n)
+                raise
+        return wait
+
+def rate_limit(max_calls=3, period=1, block=False):
+    """Allow bursts of max_calls, refilling at max_calls per period.
+
+    With block=False calls over the limit raise; with block=True they
+    wait for their turn instead.
+    """
     def decorator(func):
-        calls = []
+        bucket = TokenBucket(rate=max_calls / period, capacity=max_calls)
         @wraps(func)
         def wrapper(*args, **kwargs):
-            now = time.time()
-            calls[:] = [call_time for call_time in calls if now - call_time < period]
-            if len(calls) >= max_calls:
+            if block:
+                bucket.acquire()
+            elif not bucket.try_acquire():
                 raise Exception(f"Rate limit exceeded: {max_calls} calls per {period}s")
-            calls.append(now)
             return func(*args, **kwargs)
         return wrapper
     return decorator
@@ -130,6 +218,452 @@ try:
 except Exception as e:
     print(f"  Error: {e}")
 
+@rate_limit(max_calls=2, period=0.2, block=True)
+def throttled_call(i):
+    return i
+
+start = time.monotonic()
+for i in range(5):
+    throttled_call(i)
+print(f"  5 blocking calls at 2 per 0.2s took {time.monotonic() - start:.2f}s")
+
+print()  # Empty line
+
+
+# ============================================================================
+# 5. BOUNDED MEMOIZATION ENGINE
+# ============================================================================
+print("=" * 60)
+print("5. BOUNDED MEMOIZATION ENGINE")
+print("=" * 60)
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+_MISSING = object()
+_KWD_MARK = object()  # Separates positional args from kwargs in keys
+
+class _HashedKey(list):
+    """Key that hashes its contents once, not on every dict operation"""
+    __slots__ = ('hashvalue',)
+    
+    def __init__(self, items):
+        super().__init__(items)
+        self.hashvalue = hash(items)
+    
+    def __hash__(self):
+        return self.hashvalue
+
+_FAST_TYPES = {int, str}  # Hash cheaply and never equal a _HashedKey
+
+def _make_key(args, kwargs, typed):
+    """Build a hashable key from the call arguments without calling repr"""
+    if not kwargs and not typed and len(args) == 1 and type(args[0]) in _FAST_TYPES:
+        return args[0]
+    key = args
+    if kwargs:
+        key += (_KWD_MARK,) + tuple(kwargs.items())
+    if typed:
+        key += tuple(type(v) for v in args)
+        if kwargs:
+            key += tuple(type(v) for v in kwargs.values())
+    return _HashedKey(key)
+
+class _LRUStore:
+    """Entries ordered by recency; evicts the least recently used"""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+    
+    def get(self, key):
+        entry = self.data.get(key, _MISSING)
+        if entry is not _MISSING:
+            self.data.move_to_end(key)
+        return entry
+    
+    def put(self, key, entry):
+        self.data[key] = entry
+        self.data.move_to_end(key)
+        if self.maxsize is not None and len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+    
+    def pop(self, key):
+        self.data.pop(key, None)
+    
+    def clear(self):
+        self.data.clear()
+    
+    def __len__(self):
+        return len(self.data)
+
+class _LFUStore:
+    """Evicts the least frequently used entry (oldest first on ties) in O(1)"""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = {}                         # key -> entry
+        self.freq = {}                         # key -> use count
+        self.buckets = defaultdict(OrderedDict)  # use count -> keys
+        self.min_freq = 0
+    
+    def _touch(self, key):
+        count = self.freq[key]
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_freq == count:
+                self.min_freq = count + 1
+        self.freq[key] = count + 1
+        self.buckets[count + 1][key] = None
+    
+    def get(self, key):
+        entry = self.data.get(key, _MISSING)
+        if entry is not _MISSING:
+            self._touch(key)
+        return entry
+    
+    def put(self, key, entry):
+        if key in self.data:
+            self.data[key] = entry
+            self._touch(key)
+            return
+        if self.maxsize is not None and len(self.data) >= self.maxsize:
+            victim, _ = self.buckets[self.min_freq].popitem(last=False)
+            if not self.buckets[self.min_freq]:
+                del self.buckets[self.min_freq]
+            del self.data[victim]
+            del self.freq[victim]
+        self.data[key] = entry
+        self.freq[key] = 1
+        self.buckets[1][key] = None
+        self.min_freq = 1
+    
+    def pop(self, key):
+        if key in self.data:
+            del self.data[key]
+            count = self.freq.pop(key)
+            del self.buckets[count][key]
+            if not self.buckets[count]:
+                del self.buckets[count]
+    
+    def clear(self):
+        self.data.clear()
+        self.freq.clear()
+        self.buckets.clear()
+        self.min_freq = 0
+    
+    def __len__(self):
+        return len(self.data)
+
+def memoize(maxsize=128, policy='lru', ttl=None, typed=False):
+    """Bounded memoization decorator.
+
+    maxsize: max cached results (None for unbounded)
+    policy: 'lru' or 'lfu' eviction
+    ttl: seconds a result stays valid (None for forever)
+    typed: cache f(1) and f(1.0) separately
+    Coroutine functions are supported: the awaited result is cached, and
+    concurrent callers with the same arguments share one in-flight task,
+    which keeps running if any single caller is cancelled.
+    """
+    if policy not in ('lru', 'lfu'):
+        raise ValueError(f"Unknown eviction policy: {policy!r}")
+    
+    def decorator(func):
+        store = (_LRUStore if policy == 'lru' else _LFUStore)(maxsize)
+        lock = threading.Lock()
+        counters = {'hits': 0, 'misses': 0}
+        
+        if ttl is None:
+            # No expiry: store bare values and skip the clock on hits
+            store_get = store.get
+            
+            def lookup(key):
+                with lock:
+                    value = store_get(key)
+                    if value is _MISSING:
+                        counters['misses'] += 1
+                    else:
+                        counters['hits'] += 1
+                    return value
+            
+            def remember(key, value):
+                with lock:
+                    store.put(key, value)
+        else:
+            def lookup(key):
+                with lock:
+                    entry = store.get(key)
+                    if entry is not _MISSING:
+                        value, expires = entry
+                        if expires > time.monotonic():
+                            counters['hits'] += 1
+                            return value
+                        store.pop(key)
+                    counters['misses'] += 1
+                    return _MISSING
+            
+            def remember(key, value):
+                expires = time.monotonic() + ttl
+                with lock:
+                    store.put(key, (value, expires))
+        
+        if inspect.iscoroutinefunction(func):
+            in_flight = {}  # key -> Task shared by concurrent callers
+            
+            def finished(key, task):
+                in_flight.pop(key, None)
+                if not task.cancelled() and task.exception() is None:
+                    remember(key, task.result())
+            
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = _make_key(args, kwargs, typed)
+                value = lookup(key)
+                if value is not _MISSING:
+                    return value
+                task = in_flight.get(key)
+                if task is None:
+                    # The cache owns the call, so cancelling one caller
+                    # (e.g. a wait_for timeout) doesn't cancel the others
+                    task = asyncio.ensure_future(func(*args, **kwargs))
+                    in_flight[key] = task
+                    task.add_done_callback(lambda t, key=key: finished(key, t))
+                return await asyncio.shield(task)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not kwargs and not typed and len(args) == 1 and type(args[0]) in _FAST_TYPES:
+                    key = args[0]  # Inlined fast path of _make_key
+                else:
+                    key = _make_key(args, kwargs, typed)
+                value = lookup(key)
+                if value is _MISSING:
+                    value = func(*args, **kwargs)
+                    remember(key, value)
+                return value
+        
+        def cache_info():
+            with lock:
+                return CacheInfo(counters['hits'], counters['misses'], maxsize, len(store))
+        
+        def cache_clear():
+            with lock:
+                store.clear()
+                counters['hits'] = counters['misses'] = 0
+        
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+@memoize(maxsize=2, policy='lfu')
+def square(n):
+    return n * n
+
+for n in (1, 1, 1, 2, 3, 2):  # 1 is hot, so 3 is evicted rather than 1
+    square(n)
+print(f"  LFU cache_info: {square.cache_info()}")
+
+@memoize(maxsize=32, ttl=0.05)
+def lookup_user(user_id, *, verbose=False):
+    return {'id': user_id, 'verbose': verbose}
+
+lookup_user(1)
+lookup_user(1)
+lookup_user(1, verbose=True)
+time.sleep(0.06)  # Entries expire
+lookup_user(1)
+print(f"  TTL cache_info: {lookup_user.cache_info()}")
+
+async_calls = []
+
+@memoize(maxsize=16)
+async def fetch_profile(user_id):
+    async_calls.append(user_id)
+    await asyncio.sleep(0.01)
+    return f"profile-{user_id}"
+
+async def fetch_profiles():
+    return await asyncio.gather(*(fetch_profile(7) for _ in range(5)))
+
+profiles = asyncio.run(fetch_profiles())
+print(f"  5 concurrent awaits -> {profiles[0]!r}, coroutine ran {len(async_calls)} time(s)")
+fetch_profile.cache_clear()
+print(f"  After cache_clear: {fetch_profile.cache_info()}")
+
+# Hit-path microbenchmark: small argument and a large argument.
+# Small-argument hits are dominated by the lock that makes memoize
+# thread-safe, which cache() and the C lru_cache don't need.
+def identity(x):
+    return x
+
+big_arg = tuple(range(1000))
+candidates = {
+    'functools.lru_cache': lru_cache(maxsize=128)(identity),
+    'cache (str keys)': cache(identity),
+    'memoize lru': memoize(maxsize=128)(identity),
+    'memoize lfu': memoize(maxsize=128, policy='lfu')(identity),
+}
+print("\n  Hit-path cost per call (microseconds):")
+for name, cached in candidates.items():
+    cached(42)
+    cached(big_arg)
+    small = min(timeit.repeat(lambda: cached(42), number=20000, repeat=5)) / 20000 * 1e6
+    large = min(timeit.repeat(lambda: cached(big_arg), number=2000, repeat=5)) / 2000 * 1e6
+    print(f"    {name:<20} small arg {small:6.2f}   1000-item tuple {large:7.2f}")
+
+print()  # Empty line
+
+
+# ============================================================================
+# 6. PERSISTENT TWO-TIER MEMOIZATION
+# ============================================================================
+print("=" * 60)
+print("6. PERSISTENT TWO-TIER MEMOIZATION")
+print("=" * 60)
+
+def _stable_hash(data):
+    """Hash that is the same in every process (unlike hash() on str)"""
+    return hashlib.sha256(data).hexdigest()
+
+class _Canonical:
+    """Marker heading every canonical container; user data never contains it"""
+
+def _canonical(obj):
+    """Rewrite containers so equal values pickle to identical bytes.
+
+    Set iteration order and dict insertion order would otherwise make
+    f({1, 2}) and f({2, 1}) hash to different keys. Each container becomes
+    (_Canonical, type, items), so a dict can't share a key with a tuple
+    that happens to look like its canonical form, and list, tuple and
+    namedtuple arguments stay distinct.
+    """
+    def order(items):
+        return tuple(sorted(items, key=lambda item: pickle.dumps(item, protocol=4)))
+    
+    if isinstance(obj, dict):
+        items = order((_canonical(k), _canonical(v)) for k, v in obj.items())
+    elif isinstance(obj, (set, frozenset)):
+        items = order(_canonical(v) for v in obj)
+    elif isinstance(obj, (list, tuple)):
+        items = tuple(_canonical(v) for v in obj)
+    else:
+        return obj
+    return (_Canonical, type(obj), items)
+
+def persistent_memoize(db_path, maxsize=1024):
+    """Memoize a pure function in memory and in a SQLite file.
+
+    Lookups try an in-memory LRU first, then the database, then call the
+    function. Results survive process restarts. Keys are a SHA-256 of the
+    pickled arguments, and rows are keyed by a hash of the function's
+    source as well, so a process still running an older version can never
+    serve or overwrite the new version's results. SQLite in WAL mode with
+    a busy timeout lets several processes share one file.
+    """
+    def decorator(func):
+        try:
+            source = inspect.getsource(func)
+        except (OSError, TypeError):
+            source = func.__code__.co_code.hex()
+        func_name = f"{func.__module__}.{func.__qualname__}"
+        source_hash = _stable_hash(source.encode())
+        memory = _LRUStore(maxsize)
+        lock = threading.Lock()
+        counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        
+        conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        with lock, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS memo (
+                                func TEXT, source_hash TEXT, key TEXT, value BLOB,
+                                PRIMARY KEY (func, source_hash, key))""")
+            # Reclaim space from older versions; reads ignore them anyway
+            conn.execute("DELETE FROM memo WHERE func = ? AND source_hash != ?",
+                         (func_name, source_hash))
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _stable_hash(pickle.dumps(_canonical((args, kwargs)), protocol=4))
+            with lock:
+                value = memory.get(key)
+                if value is not _MISSING:
+                    counters['memory_hits'] += 1
+                    return value
+                row = conn.execute("SELECT value FROM memo WHERE func = ? AND key = ?"
+                                   " AND source_hash = ?",
+                                   (func_name, key, source_hash)).fetchone()
+            if row is not None:
+                value = pickle.loads(row[0])
+                with lock:
+                    counters['disk_hits'] += 1
+                    memory.put(key, value)
+                return value
+            
+            value = func(*args, **kwargs)
+            blob = pickle.dumps(value, protocol=4)
+            with lock, conn:
+                counters['misses'] += 1
+                memory.put(key, value)
+                # Another process may have stored it first; the result is the same
+                conn.execute("INSERT OR IGNORE INTO memo VALUES (?, ?, ?, ?)",
+                             (func_name, source_hash, key, blob))
+            return value
+        
+        def cache_stats():
+            with lock:
+                return dict(counters, memory_size=len(memory))
+        
+        def cache_clear(disk=False):
+            with lock:
+                memory.clear()
+                if disk:
+                    with conn:
+                        conn.execute("DELETE FROM memo WHERE func = ?", (func_name,))
+        
+        wrapper.cache_stats = cache_stats
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+memo_dir = tempfile.mkdtemp()
+memo_db = os.path.join(memo_dir, 'memo.sqlite3')
+
+def nightly_job(n):
+    time.sleep(0.05)  # Simulate an expensive pure computation
+    return sum(i * i for i in range(n))
+
+def timed_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1e6
+
+first_run = persistent_memoize(memo_db)(nightly_job)
+cold = timed_call(first_run, 10000)
+warm = timed_call(first_run, 10000)
+
+# Simulate a process restart: a fresh decorator has an empty memory tier
+second_run = persistent_memoize(memo_db)(nightly_job)
+disk = timed_call(second_run, 10000)
+promoted = timed_call(second_run, 10000)
+
+print(f"  Cold call (computed):       {cold:10.1f} us")
+print(f"  Memory hit:                 {warm:10.1f} us")
+print(f"  After restart (disk hit):   {disk:10.1f} us")
+print(f"  After restart (memory hit): {promoted:10.1f} us")
+print(f"  Second run stats: {second_run.cache_stats()}")
+
+def describe(value):
+    return f"{type(value).__name__}: {value!r}"
+
+checked = persistent_memoize(memo_db)(describe)
+Point = namedtuple('Point', 'x y')
+print(f"  {checked({'a': 1})}")
+print(f"  {checked(('dict', [('a', 1)]))}")   # Same shape as a dict's old key
+print(f"  {checked(Point(1, 2))}")
+print(f"  {checked((1, 2))}")                 # Equal to Point(1, 2), distinct key
+
+shutil.rmtree(memo_dir, ignore_errors=True)
+
 print()  # Empty line
 
 
@@ -142,7 +676,8 @@ print("=" * 60)
 print("Decorators are useful for:")
 print("  - Timing and profiling")
 print("  - Logging and debugging")
-print("  - Caching and memoization")
+print("  - Caching and memoization (bounded, with LRU/LFU and TTL)")
+print("  - Persistent memoization across process restarts")
 print("  - Rate limiting and throttling")
 print("  - Validation and error handling")
 print("=" * 60)
@@ -8,6 +8,7 @@ import sys
 import gc
 import weakref
 import tracemalloc
+from collections import Counter, OrderedDict
 
 # ============================================================================
 # 1. MEMORY-EFFICIENT DATA PROCESSING
@@ -56,15 +57,24 @@ class WeakCache:
     def size(self):
         return len(self._cache)
 
+# str and int can't be weakly referenced, so cache values are wrapped
+class CachedValue:
+    def __init__(self, data):
+        self.data = data
+
 cache = WeakCache()
 
-# Add items
-for i in range(10):
-    cache.set(i, f"value_{i}")
+# Add items, keeping strong references elsewhere
+values = [CachedValue(f"value_{i}") for i in range(10)]
+for i, value in enumerate(values):
+    cache.set(i, value)
 
 print(f"  Cache size: {cache.size()}")
 
 # Items can be garbage collected if no other references
+del values, value
+gc.collect()
+print(f"  Cache size after dropping strong references: {cache.size()}")
 print("  Cache uses weak references - items can be collected")
 
 print()  # Empty line
@@ -309,6 +319,115 @@ print("    Memory cleaned up")
 print()  # Empty line
 
 
+# ============================================================================
+# 9. MEMORY-BOUNDED CACHE (BYTE BUDGET)
+# ============================================================================
+print("=" * 60)
+print("9. MEMORY-BOUNDED CACHE (BYTE BUDGET)")
+print("=" * 60)
+
+def deep_sizeof(obj, seen=None):
+    """Estimate the total size of an object and everything it contains"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+class ByteBudgetCache:
+    """LRU cache whose capacity is a number of bytes, not entries.
+
+    Each value is sized once on insert with ``sizer`` (``sys.getsizeof``
+    by default, or ``deep_sizeof`` for nested payloads). Least recently
+    used entries are evicted until the total is back under budget.
+    """
+    
+    def __init__(self, max_bytes, sizer=sys.getsizeof):
+        self.max_bytes = max_bytes
+        self.sizer = sizer
+        self._cache = OrderedDict()  # key -> (value, size)
+        self.current_bytes = 0
+        self.peak_bytes = 0
+        self.evictions = Counter()  # reason -> count
+    
+    def get(self, key, default=None):
+        entry = self._cache.get(key)
+        if entry is None:
+            return default
+        self._cache.move_to_end(key)
+        return entry[0]
+    
+    def set(self, key, value):
+        size = self.sizer(value)
+        if size > self.max_bytes:
+            # Caching it would flush everything else and still not fit
+            self.evictions['oversize'] += 1
+            self.delete(key, reason=None)
+            return False
+        self.delete(key, reason='replaced')
+        self._cache[key] = (value, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, old_size) = self._cache.popitem(last=False)
+            self.current_bytes -= old_size
+            self.evictions['budget'] += 1
+        self.peak_bytes = max(self.peak_bytes, self.current_bytes)
+        return True
+    
+    def delete(self, key, reason='explicit'):
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return False
+        self.current_bytes -= entry[1]
+        if reason:
+            self.evictions[reason] += 1
+        return True
+    
+    def size(self):
+        return len(self._cache)
+    
+    def stats(self):
+        return {
+            'entries': len(self._cache),
+            'current_bytes': self.current_bytes,
+            'peak_bytes': self.peak_bytes,
+            'max_bytes': self.max_bytes,
+            'evictions': dict(self.evictions),
+        }
+
+# Payloads of very different sizes: an entry-count limit can't bound these
+payloads = [list(range(n)) for n in (10, 5000, 50, 12000, 100, 8000)]
+print(f"  Payload sizes (deep): {[deep_sizeof(p) for p in payloads]}")
+
+budget_cache = ByteBudgetCache(max_bytes=500_000, sizer=deep_sizeof)
+for i, payload in enumerate(payloads):
+    budget_cache.set(f'batch{i}', payload)
+budget_cache.set('batch5', list(range(20)))   # Replace a cached entry
+budget_cache.set('huge', list(range(100_000)))  # Larger than the whole budget
+
+stats = budget_cache.stats()
+print(f"  Entries kept: {stats['entries']}")
+print(f"  Current bytes: {stats['current_bytes']:,} / {stats['max_bytes']:,}")
+print(f"  Peak bytes: {stats['peak_bytes']:,}")
+print(f"  Eviction reasons: {stats['evictions']}")
+
+# sys.getsizeof only counts the outer container, which under-reports
+shallow = ByteBudgetCache(max_bytes=500_000)
+shallow.set('batch', payloads[3])
+print(f"  Shallow size of a 12000-int list: {shallow.current_bytes:,} bytes "
+      f"(deep: {deep_sizeof(payloads[3]):,})")
+
+print()  # Empty line
+
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
@@ -324,5 +443,6 @@ print("  - Detect and fix memory leaks")
 print("  - Use generators for memory-efficient iteration")
 print("  - Manage circular references with weak references")
 print("  - Clean up resources explicitly")
+print("  - Bound caches by bytes, not entry counts")
 print("=" * 60)
 
@@ -9,6 +9,10 @@ import asyncio
 import time
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import queue
+import heapq
+import itertools
+import random
+from collections import deque
 
 # ============================================================================
 # 1. FUTURES AND PROMISES
@@ -319,6 +323,397 @@ for t in threads:
 print()  # Empty line
 
 
+# ============================================================================
+# 9. TOKEN BUCKET RATE LIMITER
+# ============================================================================
+print("=" * 60)
+print("9. TOKEN BUCKET RATE LIMITER")
+print("=" * 60)
+
+class TokenBucket:
+    """Thread-safe O(1) token bucket usable from threads and from asyncio.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``
+    (the allowed burst, default ``rate``). ``acquire`` reserves its tokens
+    under the lock, letting the balance go negative, and then sleeps
+    *outside* the lock for exactly as long as the debt takes to refill,
+    so callers are served in the order they reserved. A caller that is
+    cancelled or interrupted while waiting gives its tokens back.
+    """
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def _check(self, n):
+        if n > self.capacity:
+            raise ValueError(f"Cannot acquire {n} tokens; capacity is {self.capacity}")
+    
+    def _reserve(self, n):
+        """Take n tokens (possibly into debt); return seconds to wait"""
+        self._check(n)
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= n
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+    
+    def _refund(self, n):
+        """Give back tokens reserved by a caller that stopped waiting"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + n)
+    
+    def try_acquire(self, n=1):
+        """Take n tokens if available right now; never blocks"""
+        self._check(n)
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= n:
+                self.tokens -= n
+                return True
+            return False
+    
+    def acquire(self, n=1):
+        """Block the calling thread until n tokens are granted.
+        Returns the number of seconds waited."""
+        wait = self._reserve(n)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            except BaseException:
+                self._refund(n)
+                raise
+        return wait
+    
+    async def acquire_async(self, n=1):
+        """Asyncio front-end: yields to the event loop instead of blocking"""
+        wait = self._reserve(n)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._refund(n)
+                raise
+        return wait
+
+def bucket_task(name, bucket, start):
+    bucket.acquire()
+    print(f"    {name} executed at +{time.monotonic() - start:.2f}s")
+
+print("  2 calls per second, burst of 2:")
+bucket = TokenBucket(rate=2, capacity=2)
+start = time.monotonic()
+threads = [threading.Thread(target=bucket_task, args=(f"Task-{i}", bucket, start))
+           for i in range(5)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+
+print(f"  try_acquire on an empty bucket: {bucket.try_acquire()}")
+
+async def main_token_bucket():
+    """Share one bucket between coroutines"""
+    async_bucket = TokenBucket(rate=20, capacity=5)
+    start = time.monotonic()
+    await asyncio.gather(*(async_bucket.acquire_async() for _ in range(15)))
+    return time.monotonic() - start
+
+elapsed = asyncio.run(main_token_bucket())
+print(f"  15 async acquires at 20/s with burst 5: {elapsed:.2f}s (expected ~0.50s)")
+
+async def main_cancelled_waiter():
+    """A cancelled waiter refunds its reservation"""
+    refund_bucket = TokenBucket(rate=10, capacity=1)
+    refund_bucket.try_acquire()
+    waiter = asyncio.create_task(refund_bucket.acquire_async())
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.sleep(0.1)  # One token's worth of refill
+    return refund_bucket.try_acquire()
+
+print(f"  Token free 0.1s after a cancelled waiter: {asyncio.run(main_cancelled_waiter())}")
+
+# Throughput of the limiter itself with 64 contending threads
+def limiter_throughput(call, num_threads=64, calls_per_thread=100):
+    def worker():
+        for _ in range(calls_per_thread):
+            call()
+    threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return num_threads * calls_per_thread / (time.perf_counter() - start)
+
+print("\n  Limiter overhead, 64 threads, limit far above demand (calls/sec):")
+old_limiter = RateLimiter(max_calls=1_000_000, period=1.0)
+new_limiter = TokenBucket(rate=1_000_000, capacity=1_000_000)
+print(f"    RateLimiter (list rebuild): {limiter_throughput(old_limiter.wait_if_needed):>10,.0f}")
+print(f"    TokenBucket:                {limiter_throughput(new_limiter.acquire):>10,.0f}")
+
+enforced = TokenBucket(rate=500, capacity=10)
+achieved = limiter_throughput(enforced.acquire, calls_per_thread=4)
+print(f"    TokenBucket enforcing 500/s: achieved {achieved:,.0f} calls/sec")
+
+print()  # Empty line
+
+
+# ============================================================================
+# 10. WORK-STEALING SCHEDULER
+# ============================================================================
+print("=" * 60)
+print("10. WORK-STEALING SCHEDULER")
+print("=" * 60)
+
+class StealableTask:
+    """Handle for a task submitted to WorkStealingPool"""
+    def __init__(self, pool, fn, args):
+        self.pool = pool
+        self.fn = fn
+        self.args = args
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+    
+    def run(self):
+        try:
+            self.result = self.fn(*self.args)
+        except BaseException as exc:
+            self.error = exc
+        finally:
+            self.done.set()
+            if self.pool.joining:
+                with self.pool.cond:
+                    self.pool.cond.notify_all()
+    
+    def join(self):
+        """Wait for the result; a worker thread runs other tasks meanwhile.
+
+        Each task run while joining nests on the joiner's stack, so past
+        ``max_help_depth`` levels the joiner only takes back this task
+        (if it is still at the top of its own deque) and otherwise waits.
+        When there is nothing to help with, the joiner sleeps on the pool's
+        condition until new work is submitted or a task finishes.
+        """
+        pool = self.pool
+        depth = getattr(pool.local, 'depth', 0)
+        while not self.done.is_set():
+            if depth < pool.max_help_depth:
+                pool.local.depth = depth + 1
+                try:
+                    helped = pool._run_one()
+                finally:
+                    pool.local.depth = depth
+                if not helped:
+                    pool._wait_for_work(self)
+            elif not pool._run_own(self):
+                self.done.wait()  # Only a thief can run it now
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class WorkStealingPool:
+    """Thread pool where each worker owns a deque of tasks.
+
+    A worker pushes the subtasks it spawns onto the right of its own deque
+    and pops from the right (newest first, good cache locality). Idle
+    workers steal from the *left* of another worker's deque, taking the
+    oldest - usually largest - piece of work. deque append/pop are atomic,
+    so the common path takes no lock at all; the condition variable is
+    only touched when some worker is asleep.
+    """
+    
+    def __init__(self, num_workers=4, max_help_depth=16):
+        self.num_workers = num_workers
+        self.max_help_depth = max_help_depth
+        self.deques = [deque() for _ in range(num_workers)]
+        self.local = threading.local()
+        self.cond = threading.Condition()
+        self.idle = 0
+        self.joining = 0  # Threads blocked in join(), woken on each completion
+        self.closed = False
+        self.next_queue = itertools.count()
+        self.steals = 0
+        self.workers = [threading.Thread(target=self._worker, args=(i,), daemon=True)
+                        for i in range(num_workers)]
+        for worker in self.workers:
+            worker.start()
+    
+    def submit(self, fn, *args):
+        task = StealableTask(self, fn, args)
+        worker_id = getattr(self.local, 'worker_id', None)
+        if worker_id is None:  # Called from outside the pool
+            worker_id = next(self.next_queue) % self.num_workers
+        self.deques[worker_id].append(task)
+        if self.idle or self.joining:
+            with self.cond:
+                if self.joining:
+                    self.cond.notify_all()  # A joiner may be the only sleeper
+                else:
+                    self.cond.notify()
+        return task
+    
+    def _find_task(self):
+        worker_id = getattr(self.local, 'worker_id', None)
+        if worker_id is not None:
+            try:
+                return self.deques[worker_id].pop()
+            except IndexError:
+                pass
+        start = random.randrange(self.num_workers)
+        for offset in range(self.num_workers):
+            victim = (start + offset) % self.num_workers
+            if victim == worker_id:
+                continue
+            try:
+                task = self.deques[victim].popleft()
+            except IndexError:
+                continue
+            self.steals += 1
+            return task
+        return None
+    
+    def _run_one(self):
+        task = self._find_task()
+        if task is None:
+            return False
+        task.run()
+        return True
+    
+    def _run_own(self, task):
+        """Run task if it is still the newest entry in this worker's deque"""
+        worker_id = getattr(self.local, 'worker_id', None)
+        if worker_id is None:
+            return False
+        own = self.deques[worker_id]
+        try:
+            newest = own.pop()
+        except IndexError:
+            return False
+        if newest is not task:
+            own.append(newest)  # Someone else's dependency; put it back
+            return False
+        task.run()
+        return True
+    
+    def _wait_for_work(self, task):
+        """Block until task finishes or any deque has work to help with"""
+        with self.cond:
+            self.joining += 1
+            while not task.done.is_set() and not any(self.deques):
+                self.cond.wait()
+            self.joining -= 1
+    
+    def _worker(self, worker_id):
+        self.local.worker_id = worker_id
+        while True:
+            if self._run_one():
+                continue
+            with self.cond:
+                self.idle += 1
+                while not self.closed and not any(self.deques):
+                    self.cond.wait()
+                self.idle -= 1
+                if self.closed and not any(self.deques):
+                    return
+    
+    def shutdown(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        for worker in self.workers:
+            worker.join()
+
+def parallel_sum(pool, data, lo, hi, threshold=2000):
+    """Divide and conquer: spawn the left half, compute the right half inline"""
+    if hi - lo <= threshold:
+        return sum(data[lo:hi])
+    mid = (lo + hi) // 2
+    left = pool.submit(parallel_sum, pool, data, lo, mid, threshold)
+    right = parallel_sum(pool, data, mid, hi, threshold)
+    return left.join() + right
+
+def merge_sort(pool, items, threshold=1000):
+    if len(items) <= threshold:
+        return sorted(items)
+    mid = len(items) // 2
+    left = pool.submit(merge_sort, pool, items[:mid], threshold)
+    right = merge_sort(pool, items[mid:], threshold)
+    return list(heapq.merge(left.join(), right))
+
+sum_data = list(range(1_000_000))
+sort_data = [random.random() for _ in range(200_000)]
+
+stealing_pool = WorkStealingPool(num_workers=4)
+start = time.perf_counter()
+total = stealing_pool.submit(parallel_sum, stealing_pool, sum_data, 0, len(sum_data)).join()
+stealing_sum_time = time.perf_counter() - start
+start = time.perf_counter()
+sorted_data = stealing_pool.submit(merge_sort, stealing_pool, sort_data).join()
+stealing_sort_time = time.perf_counter() - start
+stealing_pool.shutdown()
+print(f"  Parallel sum: {total} (correct: {total == sum(sum_data)})")
+print(f"  Merge sort correct: {sorted_data == sorted(sort_data)}")
+print(f"  Tasks stolen between workers: {stealing_pool.steals}")
+
+# Tiny leaves mean ~25,000 tasks; bounded helping keeps the stacks shallow
+fine_pool = WorkStealingPool(num_workers=4)
+fine_data = list(range(200_000))
+fine_total = fine_pool.submit(parallel_sum, fine_pool, fine_data, 0, len(fine_data), 8).join()
+fine_pool.shutdown()
+print(f"  Sum with threshold=8 (no RecursionError): {fine_total == sum(fine_data)}")
+
+# The shared-queue WorkerPool can't let tasks wait on subtasks (a blocked
+# worker would hold its thread), so split the work up front instead
+class CallableWorkerPool(WorkerPool):
+    """WorkerPool that runs (function, args, result_slot) tasks"""
+    def _worker(self, worker_id):
+        while True:
+            task = self.task_queue.get()
+            if task is None:
+                self.task_queue.task_done()
+                break
+            fn, args, slot = task
+            slot.append(fn(*args))
+            self.task_queue.task_done()
+
+shared_pool = CallableWorkerPool(4)
+shared_pool.start()
+start = time.perf_counter()
+slots = []
+for lo in range(0, len(sum_data), 2000):
+    slot = []
+    slots.append(slot)
+    shared_pool.submit((sum, (sum_data[lo:lo + 2000],), slot))
+shared_pool.task_queue.join()
+shared_total = sum(slot[0] for slot in slots)
+shared_sum_time = time.perf_counter() - start
+shared_pool.shutdown()
+
+print("\n  Sum of 1,000,000 ints in ~500 leaf tasks, 4 workers:")
+print(f"    WorkerPool (one shared queue): {shared_sum_time * 1000:7.1f} ms")
+print(f"    WorkStealingPool (recursive):  {stealing_sum_time * 1000:7.1f} ms")
+start = time.perf_counter()
+sorted(sort_data)
+builtin_sort_time = time.perf_counter() - start
+print(f"  Merge sort of 200,000 floats (work stealing): {stealing_sort_time * 1000:.1f} ms")
+print(f"  Built-in sorted() on one thread:               {builtin_sort_time * 1000:.1f} ms")
+# merge_sort's merging is pure-Python CPU work, so under the GIL the four
+# workers take turns rather than run in parallel and C sorted() wins easily.
+# The pool shows how fork-join tasks are scheduled, not a CPU speedup.
+
+print()  # Empty line
+
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
@@ -329,10 +724,11 @@ print("Key Patterns:")
 print("  - Futures for async task results")
 print("  - Producer-consumer with queues")
 print("  - Worker pool pattern")
+print("  - Work stealing for recursive, fork-join workloads")
 print("  - Async with semaphores")
 print("  - Async queues")
 print("  - Mix threading and asyncio")
-print("  - Rate limiting")
+print("  - Rate limiting (token bucket, no sleeping under locks)")
 print("  - Choose right concurrency model for task")
 print("=" * 60)
 
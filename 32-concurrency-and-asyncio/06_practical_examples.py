@@ -8,8 +8,16 @@ import threading
 import asyncio
 import time
 import requests
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import (Future, ThreadPoolExecutor, ProcessPoolExecutor,
+                                FIRST_COMPLETED, wait)
+from multiprocessing import shared_memory
+from array import array
+import heapq
+import itertools
+import operator
 import queue
+import random
+import weakref
 
 # ============================================================================
 # 1. WEB SCRAPER WITH THREADING
@@ -25,24 +33,11 @@ def fetch_url(url):
     print(f"    Fetched {url}")
     return f"Content from {url}"
 
-def scrape_urls_threading(urls):
-    """Scrape multiple URLs using threading"""
-    results = []
-    threads = []
-    
-    def worker(url):
-        result = fetch_url(url)
-        results.append(result)
-    
-    for url in urls:
-        thread = threading.Thread(target=worker, args=(url,))
-        threads.append(thread)
-        thread.start()
-    
-    for thread in threads:
-        thread.join()
-    
-    return results
+def scrape_urls_threading(urls, max_workers=8):
+    """Scrape multiple URLs using a fixed pool of threads"""
+    # A pool bounds the thread count no matter how many URLs there are
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fetch_url, urls))
 
 urls = ["url1", "url2", "url3", "url4"]
 print("  Scraping URLs with threading...")
@@ -95,7 +90,9 @@ def process_data_chunk(chunk):
 
 def process_data_parallel(data, num_workers=4):
     """Process data in parallel"""
-    chunk_size = len(data) // num_workers
+    # Round up so the remainder is spread over the workers instead of
+    # becoming an extra chunk (and so fewer items than workers still works)
+    chunk_size = max(1, -(-len(data) // num_workers))
     chunks = [data[i:i+chunk_size] for i in range(0, len(data), chunk_size)]
     
     print(f"  Processing {len(data)} items with {num_workers} workers...")
@@ -134,23 +131,9 @@ class DownloadManager:
             return f"File from {url}"
     
     def download_all(self, urls):
-        """Download all URLs"""
-        threads = []
-        results = []
-        
-        def worker(url):
-            result = self.download(url)
-            results.append(result)
-        
-        for url in urls:
-            thread = threading.Thread(target=worker, args=(url,))
-            threads.append(thread)
-            thread.start()
-        
-        for thread in threads:
-            thread.join()
-        
-        return results
+        """Download all URLs with at most max_concurrent threads"""
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
+            return list(executor.map(self.download, urls))
 
 manager = DownloadManager(max_concurrent=3)
 urls = [f"file{i}.zip" for i in range(10)]
@@ -336,6 +319,853 @@ print(f"  Final result: {result}")
 print()  # Empty line
 
 
+# ============================================================================
+# 9. PRIORITY TASK QUEUE WITH FUTURES AND BACKPRESSURE
+# ============================================================================
+print("=" * 60)
+print("9. PRIORITY TASK QUEUE WITH FUTURES AND BACKPRESSURE")
+print("=" * 60)
+
+class PriorityTaskQueue:
+    """Worker pool fed by a bounded priority queue.
+
+    ``enqueue`` returns a ``concurrent.futures.Future``. Lower priority
+    numbers run first, FIFO within a priority. When ``maxsize`` tasks are
+    waiting, ``enqueue`` either blocks (optionally with a timeout) or, with
+    ``reject_when_full=True``, raises ``queue.Full`` immediately. ``submit``
+    matches ``Executor.submit``: every keyword goes to ``fn``. Workers
+    sleep on a condition variable, so shutdown wakes them at once instead
+    of waiting out a polling timeout.
+    """
+    
+    def __init__(self, num_workers=3, maxsize=100, reject_when_full=False):
+        self.maxsize = maxsize
+        self.reject_when_full = reject_when_full
+        self.heap = []
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.closed = False
+        self.started = time.perf_counter()
+        self.busy_seconds = [0.0] * num_workers
+        self.tasks_done = [0] * num_workers
+        self.workers = [threading.Thread(target=self._worker, args=(i,), daemon=True)
+                        for i in range(num_workers)]
+        for worker in self.workers:
+            worker.start()
+    
+    def submit(self, fn, /, *args, **kwargs):
+        """Queue fn(*args, **kwargs) at the default priority"""
+        return self.enqueue(fn, args, kwargs)
+    
+    def enqueue(self, fn, args=(), kwargs=None, *, priority=0, timeout=None):
+        """Queue fn(*args, **kwargs); timeout bounds the wait for queue space"""
+        kwargs = kwargs or {}
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("cannot submit after shutdown")
+            if len(self.heap) >= self.maxsize:
+                if self.reject_when_full:
+                    raise queue.Full("task queue is full")
+                # wait_for tracks one deadline across spurious or lost wakeups
+                if not self.not_full.wait_for(
+                        lambda: self.closed or len(self.heap) < self.maxsize, timeout):
+                    raise queue.Full("timed out waiting for queue space")
+                if self.closed:
+                    raise RuntimeError("cannot submit after shutdown")
+            heapq.heappush(self.heap, (priority, next(self.counter), future, fn, args, kwargs))
+            self.not_empty.notify()
+        return future
+    
+    def _worker(self, worker_id):
+        while True:
+            with self.lock:
+                while not self.heap and not self.closed:
+                    self.not_empty.wait()
+                if not self.heap:
+                    return  # Closed and drained
+                _, _, future, fn, args, kwargs = heapq.heappop(self.heap)
+                self.not_full.notify()
+            if not future.set_running_or_notify_cancel():
+                continue
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+            self.busy_seconds[worker_id] += time.perf_counter() - start
+            self.tasks_done[worker_id] += 1
+    
+    def shutdown(self, wait=True, cancel_pending=False):
+        with self.lock:
+            self.closed = True
+            if cancel_pending:
+                for _, _, future, *_ in self.heap:
+                    future.cancel()
+                self.heap.clear()
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+        if wait:
+            for worker in self.workers:
+                worker.join()
+    
+    def metrics(self):
+        """Tasks completed and busy fraction for each worker"""
+        elapsed = time.perf_counter() - self.started
+        return [{'worker': i, 'tasks': self.tasks_done[i],
+                 'utilisation': self.busy_seconds[i] / elapsed if elapsed else 0.0}
+                for i in range(len(self.workers))]
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+def run_task(task):
+    time.sleep(0.05)  # Simulate work
+    return f"{task} done"
+
+task_pool = PriorityTaskQueue(num_workers=3, maxsize=5)
+futures = [task_pool.enqueue(run_task, (f"Task-{i}",), priority=1) for i in range(5)]
+urgent = task_pool.enqueue(run_task, ("Urgent",), priority=0)
+print(f"  {urgent.result()}")
+print(f"  Results: {[f.result() for f in futures]}")
+
+def fetch_with_timeout(url, timeout=None):
+    return f"GET {url} (timeout={timeout})"
+
+# Like Executor.submit, every keyword reaches the function
+print(f"  {task_pool.submit(fetch_with_timeout, 'https://example.com', timeout=5).result()}")
+
+full_pool = PriorityTaskQueue(num_workers=1, maxsize=2, reject_when_full=True)
+try:
+    for i in range(10):
+        full_pool.submit(time.sleep, 0.05)
+except queue.Full as e:
+    print(f"  Rejected after {i} submissions: {e}")
+
+start = time.perf_counter()
+task_pool.shutdown()
+full_pool.shutdown(cancel_pending=True)
+print(f"  Shutdown took {(time.perf_counter() - start) * 1000:.1f} ms (no polling)")
+for m in task_pool.metrics():
+    print(f"    Worker {m['worker']}: {m['tasks']} tasks, {m['utilisation']:.0%} busy")
+
+# Throughput with trivial tasks versus ThreadPoolExecutor
+def noop():
+    return None
+
+num_tasks = 20_000
+for name, make_pool in [("ThreadPoolExecutor", lambda: ThreadPoolExecutor(max_workers=4)),
+                        ("PriorityTaskQueue", lambda: PriorityTaskQueue(4, maxsize=1000))]:
+    pool = make_pool()
+    start = time.perf_counter()
+    bench_futures = [pool.submit(noop) for _ in range(num_tasks)]
+    for f in bench_futures:
+        f.result()
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    print(f"  {name:<18} {num_tasks / elapsed:>10,.0f} tasks/sec")
+
+print()  # Empty line
+
+
+# ============================================================================
+# 10. ZERO-COPY PARALLEL PROCESSING WITH SHARED MEMORY
+# ============================================================================
+print("=" * 60)
+print("10. ZERO-COPY PARALLEL PROCESSING WITH SHARED MEMORY")
+print("=" * 60)
+
+def sum_of_squares_view(view):
+    """Reduce one chunk in place (view is a typed memoryview)"""
+    return sum(map(operator.mul, view, view))
+
+def _run_on_shared_chunk(chunk_func, name, typecode, offset, length):
+    """Worker side: attach to the block and hand chunk_func a typed view"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        view = shm.buf.cast(typecode)[offset:offset + length]
+        try:
+            return chunk_func(view)
+        finally:
+            view.release()
+    finally:
+        shm.close()
+
+class SharedMemoryProcessor:
+    """Parallel reductions over numeric data without pickling the data.
+
+    The input is copied once into a ``multiprocessing.shared_memory`` block
+    as a typed array; workers receive only ``(name, offset, length)``
+    descriptors and read their slice in place. The process pool is
+    created once and reused across calls.
+    """
+    
+    def __init__(self, num_workers=4):
+        self.num_workers = num_workers
+        self.executor = ProcessPoolExecutor(max_workers=num_workers)
+    
+    def run(self, chunk_func, data, typecode='d'):
+        """Apply chunk_func to num_workers slices; return the partial results"""
+        values = data if isinstance(data, array) and data.typecode == typecode \
+            else array(typecode, data)
+        if not values:
+            return []
+        nbytes = len(values) * values.itemsize
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        try:
+            shm.buf[:nbytes] = memoryview(values).cast('B')
+            chunk_size = -(-len(values) // self.num_workers)  # Ceiling division
+            descriptors = [(offset, min(chunk_size, len(values) - offset))
+                           for offset in range(0, len(values), chunk_size)]
+            futures = [self.executor.submit(_run_on_shared_chunk, chunk_func,
+                                            shm.name, typecode, offset, length)
+                       for offset, length in descriptors]
+            return [f.result() for f in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+    
+    def shutdown(self):
+        self.executor.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+def sum_of_squares_list(chunk):
+    return sum(x * x for x in chunk)
+
+def sum_of_squares_pickled(data, num_workers=4):
+    """process_data_parallel without the simulated delay: chunks are pickled"""
+    chunk_size = -(-len(data) // num_workers)
+    chunks = [data[i:i+chunk_size] for i in range(0, len(data), chunk_size)]
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        return sum(executor.map(sum_of_squares_list, chunks))
+
+# Kept small so the example runs quickly; raise it (e.g. 100_000_000) on a
+# machine with enough cores and memory to see the full effect
+num_elements = 2_000_000
+numbers = list(range(num_elements))
+
+with SharedMemoryProcessor(num_workers=4) as processor:
+    assert sum(processor.run(sum_of_squares_view, range(10), typecode='q')) == 285
+    start = time.perf_counter()
+    for _ in range(3):
+        shared_total = sum(processor.run(sum_of_squares_view, numbers, typecode='q'))
+    shared_time = (time.perf_counter() - start) / 3
+
+start = time.perf_counter()
+for _ in range(3):
+    pickled_total = sum_of_squares_pickled(numbers)
+pickled_time = (time.perf_counter() - start) / 3
+
+print(f"  Sum of squares of {num_elements:,} ints, 4 workers (average of 3 calls):")
+print(f"    Pickled list chunks, new pool per call: {pickled_time * 1000:7.0f} ms")
+print(f"    Shared memory, reused pool:             {shared_time * 1000:7.0f} ms")
+print(f"    Same result: {shared_total == pickled_total}")
+
+print()  # Empty line
+
+
+# ============================================================================
+# 11. ADAPTIVE BATCH SIZING
+# ============================================================================
+print("=" * 60)
+print("11. ADAPTIVE BATCH SIZING")
+print("=" * 60)
+
+class AdaptiveBatcher:
+    """Processes an iterable in batches whose size tracks a target latency.
+
+    Items are pulled lazily, so at most ``max_in_flight`` batches exist at
+    once, counting finished batches held back for ordered output. After
+    each full batch the size is scaled by ``target / observed`` latency
+    (limited to halving or doubling per step), so it converges on batches
+    that take about ``target_latency`` seconds. The short final batch
+    doesn't rescale it.
+    """
+    
+    def __init__(self, process_batch, target_latency=0.05, initial_size=16,
+                 min_size=1, max_size=100_000, max_in_flight=4, num_workers=4):
+        self.process_batch = process_batch
+        self.target_latency = target_latency
+        self.batch_size = initial_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_in_flight = max_in_flight
+        self.num_workers = num_workers
+        self.history = []  # (batch_size, latency) per completed batch
+    
+    def _timed(self, batch):
+        start = time.perf_counter()
+        result = self.process_batch(batch)
+        return result, time.perf_counter() - start
+    
+    def _record(self, size, latency, full):
+        self.history.append((size, latency))
+        if not full:
+            return
+        factor = self.target_latency / latency if latency > 0 else 2.0
+        factor = min(2.0, max(0.5, factor))
+        self.batch_size = int(min(self.max_size, max(self.min_size, size * factor)))
+    
+    def run(self, items, ordered=False):
+        """Yield one result per batch, in completion or input order"""
+        source = iter(items)
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            in_flight = {}  # future -> (sequence number, batch size, full batch?)
+            finished = {}   # sequence number -> result, for ordered output
+            next_seq = next_to_yield = 0
+            exhausted = False
+            while in_flight or not exhausted:
+                # Held-back results count too, so a slow head batch can't
+                # let the rest of the input pile up in `finished`
+                while not exhausted and len(in_flight) + len(finished) < self.max_in_flight:
+                    size = self.batch_size
+                    batch = list(itertools.islice(source, size))
+                    if len(batch) < size:
+                        exhausted = True
+                    if not batch:
+                        break
+                    future = executor.submit(self._timed, batch)
+                    in_flight[future] = (next_seq, len(batch), len(batch) == size)
+                    next_seq += 1
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    seq, size, full = in_flight.pop(future)
+                    result, latency = future.result()
+                    self._record(size, latency, full)
+                    if ordered:
+                        finished[seq] = result
+                    else:
+                        yield result
+                while ordered and next_to_yield in finished:
+                    yield finished.pop(next_to_yield)
+                    next_to_yield += 1
+
+def process_batch_timed(batch):
+    """Cost grows with batch size: ~0.1ms per item plus 2ms fixed overhead"""
+    time.sleep(0.002 + 0.0001 * len(batch))
+    return sum(batch)
+
+batcher = AdaptiveBatcher(process_batch_timed, target_latency=0.02, initial_size=4)
+adaptive_total = sum(batcher.run(iter(range(20_000)), ordered=True))
+sizes = [size for size, _ in batcher.history]
+print(f"  Final result: {adaptive_total} (expected {sum(range(20_000))})")
+print(f"  Batches: {len(sizes)}, sizes: {sizes[:8]} ... {sizes[-3:]}")
+print(f"  Batch size converged to ~{batcher.batch_size} "
+      f"(target 20ms -> ~180 items)")
+
+print()  # Empty line
+
+
+# ============================================================================
+# 12. BOUNDED FETCH EXECUTOR (THREADS AND ASYNCIO)
+# ============================================================================
+print("=" * 60)
+print("12. BOUNDED FETCH EXECUTOR (THREADS AND ASYNCIO)")
+print("=" * 60)
+
+class FetchExecutor:
+    """Fixed pool of fetch threads that streams results back.
+
+    URLs are pulled lazily from any iterable and at most ``max_pending``
+    are queued at once, so 50k URLs cost ``num_workers`` threads and a
+    small window of futures, not 50k threads. Results are yielded as
+    ``(url, result, error)`` in completion order.
+    """
+    
+    def __init__(self, num_workers=16, max_pending=None):
+        self.num_workers = num_workers
+        self.max_pending = max_pending or num_workers * 2
+        self.executor = ThreadPoolExecutor(max_workers=num_workers)
+    
+    def stream(self, fetch, urls):
+        urls = iter(urls)
+        pending = {}
+        for url in itertools.islice(urls, self.max_pending):
+            pending[self.executor.submit(fetch, url)] = url
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                error = future.exception()
+                yield url, (None if error else future.result()), error
+                for next_url in itertools.islice(urls, 1):
+                    pending[self.executor.submit(fetch, next_url)] = next_url
+    
+    def shutdown(self):
+        self.executor.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+async def stream_fetch_async(fetch, urls, concurrency=100):
+    """Asyncio equivalent: ``concurrency`` worker coroutines share a bounded
+    queue and results are yielded as they complete. The results queue is
+    bounded too, so a slow consumer stalls the workers instead of letting
+    finished results pile up in memory."""
+    url_queue = asyncio.Queue(maxsize=concurrency * 2)
+    results = asyncio.Queue(maxsize=concurrency)
+    done_marker = object()
+    
+    async def feeder():
+        for url in urls:
+            await url_queue.put(url)
+        for _ in range(concurrency):
+            await url_queue.put(done_marker)
+    
+    async def worker():
+        while True:
+            url = await url_queue.get()
+            if url is done_marker:
+                await results.put(done_marker)
+                return
+            try:
+                item = (url, await fetch(url), None)
+            except Exception as exc:
+                item = (url, None, exc)
+            await results.put(item)
+    
+    tasks = [asyncio.create_task(feeder())]
+    tasks += [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        finished = 0
+        while finished < concurrency:
+            item = await results.get()
+            if item is done_marker:
+                finished += 1
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+print("  Pooled scrape of 8 URLs with 4 threads:")
+with FetchExecutor(num_workers=4) as fetcher:
+    pooled = list(fetcher.stream(fetch_url, [f"url{i}" for i in range(8)]))
+print(f"  Streamed {len(pooled)} results")
+
+async def collect_async(urls):
+    return [item async for item in stream_fetch_async(fetch_url_async, urls, concurrency=4)]
+
+print("  Async scrape of 8 URLs, 4 at a time:")
+print(f"  Streamed {len(asyncio.run(collect_async([f'url{i}' for i in range(8)])))} results")
+
+async def slow_consumer(num_urls, concurrency=4):
+    """Read a few results slowly and report how many fetches ran ahead"""
+    started = 0
+    
+    async def counting_fetch(url):
+        nonlocal started
+        started += 1
+        return url
+    
+    stream = stream_fetch_async(counting_fetch, range(num_urls), concurrency)
+    consumed = 0
+    async for _ in stream:
+        consumed += 1
+        await asyncio.sleep(0.01)
+        if consumed == 5:
+            break
+    await stream.aclose()
+    return consumed, started
+
+consumed, started = asyncio.run(slow_consumer(10_000))
+print(f"  Slow consumer read {consumed} of 10,000 results; only {started} fetches started")
+
+# Benchmark harness: simulated 20ms latency, no output per URL
+SIMULATED_LATENCY = 0.02
+num_urls = 2000
+
+def simulated_fetch(url):
+    time.sleep(SIMULATED_LATENCY)
+    return len(url)
+
+async def simulated_fetch_async(url):
+    await asyncio.sleep(SIMULATED_LATENCY)
+    return len(url)
+
+def thread_per_task(urls):
+    results = []
+    threads = [threading.Thread(target=lambda u=url: results.append(simulated_fetch(u)))
+               for url in urls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def pooled(urls):
+    with FetchExecutor(num_workers=256) as fetcher:
+        return [result for _, result, _ in fetcher.stream(simulated_fetch, urls)]
+
+def async_mode(urls):
+    async def run():
+        return [result async for _, result, _ in
+                stream_fetch_async(simulated_fetch_async, urls, concurrency=256)]
+    return asyncio.run(run())
+
+bench_urls = [f"https://example.com/item/{i}" for i in range(num_urls)]
+print(f"\n  {num_urls:,} URLs at {SIMULATED_LATENCY * 1000:.0f}ms simulated latency:")
+for name, mode in [("thread per task", thread_per_task),
+                   ("pooled (256 threads)", pooled),
+                   ("asyncio (256 tasks)", async_mode)]:
+    start = time.perf_counter()
+    fetched = mode(bench_urls)
+    elapsed = time.perf_counter() - start
+    print(f"    {name:<21} {elapsed:6.2f}s  {len(fetched) / elapsed:>8,.0f} URLs/sec")
+
+print()  # Empty line
+
+
+# ============================================================================
+# 13. SHARDED COUNTERS AND LATENCY HISTOGRAMS
+# ============================================================================
+print("=" * 60)
+print("13. SHARDED COUNTERS AND LATENCY HISTOGRAMS")
+print("=" * 60)
+
+class _ThreadToken:
+    """Lives only in a thread's local storage; dies when the thread exits"""
+    __slots__ = ('__weakref__',)
+
+def _retire_shard(owner_ref, shard):
+    owner = owner_ref()
+    if owner is not None:
+        with owner._registry_lock:
+            del owner._shards[id(shard)]
+            owner._fold(shard)
+
+class _PerThreadShards:
+    """Registry of per-thread shards that folds a shard away when its
+    thread exits, so thread-per-task workloads don't grow it forever."""
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = {}  # id(shard) -> shard, live threads only
+        self._registry_lock = threading.Lock()
+    
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = self._new_shard()
+            token = self._local.token = _ThreadToken()
+            with self._registry_lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(token, _retire_shard, weakref.ref(self), shard)
+            return shard
+
+class ShardedCounter(_PerThreadShards):
+    """Counter where every thread increments its own slot.
+
+    A thread takes the registry lock once, the first time it touches the
+    counter; after that increments touch only its private slot. When a
+    thread exits its slot is added to a base total and dropped. Reads
+    add up the live slots, so they are cheap but may miss increments
+    that are happening at that very moment.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._retired = 0
+    
+    def _new_shard(self):
+        return [0]
+    
+    def _fold(self, slot):
+        self._retired += slot[0]
+    
+    def increment(self, n=1):
+        self._shard()[0] += n
+    
+    def get_value(self):
+        with self._registry_lock:
+            return self._retired + sum(slot[0] for slot in self._shards.values())
+
+class LatencyHistogram(_PerThreadShards):
+    """Per-thread latency histogram with fixed log2 buckets.
+
+    Bucket i counts samples in [2**(i-1), 2**i) microseconds, from under
+    1us up to ~2**(num_buckets-1)us. Like ShardedCounter, each thread
+    writes only its own bucket array, exited threads are folded into a
+    retired shard, and ``snapshot`` merges them.
+    """
+    
+    def __init__(self, num_buckets=32):
+        super().__init__()
+        self.num_buckets = num_buckets
+        self._retired = self._new_shard()
+    
+    def _new_shard(self):
+        return {'buckets': [0] * self.num_buckets, 'sum': 0.0}
+    
+    def _fold(self, shard):
+        retired = self._retired
+        for i, count in enumerate(shard['buckets']):
+            retired['buckets'][i] += count
+        retired['sum'] += shard['sum']
+    
+    def record(self, seconds):
+        micros = int(seconds * 1_000_000)
+        index = min(micros.bit_length(), self.num_buckets - 1)
+        shard = self._shard()
+        shard['buckets'][index] += 1
+        shard['sum'] += seconds
+    
+    def snapshot(self):
+        with self._registry_lock:
+            shards = [self._retired, *self._shards.values()]
+            buckets = [sum(column) for column in zip(*(shard['buckets'] for shard in shards))]
+            total = sum(shard['sum'] for shard in shards)
+        count = sum(buckets)
+        return {'count': count, 'mean': total / count if count else 0.0,
+                'p50': self._percentile(buckets, count, 0.50),
+                'p99': self._percentile(buckets, count, 0.99)}
+    
+    @staticmethod
+    def _percentile(buckets, count, q):
+        """Upper bound (seconds) of the bucket holding the q-th sample"""
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if seen >= rank:
+                return (2 ** i) / 1_000_000
+        return (2 ** (len(buckets) - 1)) / 1_000_000
+
+class SnapshotExporter:
+    """Calls ``export(snapshot)`` every ``interval`` seconds in the background"""
+    
+    def __init__(self, metrics, export, interval=1.0):
+        self.metrics = metrics  # name -> ShardedCounter or LatencyHistogram
+        self.export = export
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def snapshot(self):
+        return {name: metric.get_value() if isinstance(metric, ShardedCounter)
+                else metric.snapshot()
+                for name, metric in self.metrics.items()}
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export(self.snapshot())
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.export(self.snapshot())  # Final flush
+
+class ShardedMonitoredTask:
+    """MonitoredTask built on sharded counters and a latency histogram"""
+    def __init__(self):
+        self.completed = ShardedCounter()
+        self.failed = ShardedCounter()
+        self.latency = LatencyHistogram()
+    
+    def execute_task(self, task_id):
+        start = time.perf_counter()
+        try:
+            time.sleep(0.01 * (task_id % 5))
+            self.completed.increment()
+        except Exception:
+            self.failed.increment()
+        finally:
+            self.latency.record(time.perf_counter() - start)
+    
+    def get_stats(self):
+        return {"completed": self.completed.get_value(),
+                "failed": self.failed.get_value(),
+                "latency": self.latency.snapshot()}
+
+sharded_monitor = ShardedMonitoredTask()
+exports = []
+exporter = SnapshotExporter({'completed': sharded_monitor.completed,
+                             'latency': sharded_monitor.latency},
+                            exports.append, interval=0.02).start()
+threads = [threading.Thread(target=sharded_monitor.execute_task, args=(i,)) for i in range(10)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+exporter.stop()
+
+stats = sharded_monitor.get_stats()
+print(f"  Completed: {stats['completed']}, failed: {stats['failed']}")
+print(f"  Latency p50 <= {stats['latency']['p50'] * 1000:.1f} ms, "
+      f"p99 <= {stats['latency']['p99'] * 1000:.1f} ms")
+print(f"  Exporter took {len(exports)} snapshots; last: completed={exports[-1]['completed']}")
+print(f"  Live counter slots after the task threads exited: {len(sharded_monitor.completed._shards)}")
+
+# Contention benchmark: 8 threads x 50,000 increments
+class LockedCounter:
+    """Same locking as ThreadSafeCounter (04_synchronization.py) and MonitoredTask"""
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+    
+    def increment(self):
+        with self._lock:
+            self._value += 1
+    
+    def get_value(self):
+        with self._lock:
+            return self._value
+
+def hammer(counter, num_threads=8, increments=50_000):
+    def worker():
+        increment = counter.increment
+        for _ in range(increments):
+            increment()
+    threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+print("\n  8 threads x 50,000 increments:")
+for name, counter in [("Lock per increment", LockedCounter()), ("ShardedCounter", ShardedCounter())]:
+    elapsed = hammer(counter)
+    print(f"    {name:<20} {elapsed * 1000:7.1f} ms  (value {counter.get_value():,})")
+
+print()  # Empty line
+
+
+# ============================================================================
+# 14. BOUNDED ASYNC MAP WITH STREAMING RESULTS
+# ============================================================================
+print("=" * 60)
+print("14. BOUNDED ASYNC MAP WITH STREAMING RESULTS")
+print("=" * 60)
+
+async def amap(func, items, concurrency=10, ordered=False, timeout=None):
+    """Async generator applying coroutine function ``func`` to each item.
+
+    At most ``concurrency`` tasks exist at any time, and items are pulled
+    from ``items`` (a regular or async iterable) only as slots free up.
+    Results are yielded as they complete, or in input order when
+    ``ordered=True``. Finished results waiting in the reorder buffer keep
+    their slot, so a slow item holds back at most ``concurrency`` others.
+    ``timeout`` applies to each item. The first error cancels every
+    in-flight task and is raised to the caller.
+    """
+    if hasattr(items, '__aiter__'):
+        source = items.__aiter__()
+        async def next_item():
+            return await source.__anext__()
+    else:
+        source = iter(items)
+        async def next_item():
+            try:
+                return next(source)
+            except StopIteration:
+                raise StopAsyncIteration from None
+    
+    async def call(item):
+        if timeout is None:
+            return await func(item)
+        return await asyncio.wait_for(func(item), timeout)
+    
+    pending = {}    # task -> input position
+    finished = {}   # input position -> result (ordered mode only)
+    next_index = next_to_yield = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) + len(finished) < concurrency:
+                try:
+                    item = await next_item()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending[asyncio.ensure_future(call(item))] = next_index
+                next_index += 1
+            if not pending:
+                break
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=pending.get):
+                index = pending.pop(task)
+                result = task.result()  # Re-raises the item's error
+                if ordered:
+                    finished[index] = result
+                else:
+                    yield result
+            while ordered and next_to_yield in finished:
+                yield finished.pop(next_to_yield)
+                next_to_yield += 1
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+async def fetch_endpoint(endpoint):
+    await asyncio.sleep(random.uniform(0.01, 0.05))  # Simulate API call
+    return {"endpoint": endpoint, "data": f"Data from {endpoint}"}
+
+async def stream_apis():
+    print("  Streaming 4 endpoints, 2 at a time, in completion order:")
+    async for result in amap(fetch_endpoint, endpoints, concurrency=2):
+        print(f"    Got {result['endpoint']}")
+    
+    ordered = [r['endpoint'] async for r in amap(fetch_endpoint, endpoints,
+                                                  concurrency=4, ordered=True)]
+    print(f"  Ordered mode: {ordered}")
+    
+    async def flaky(i):
+        await asyncio.sleep(0.2 if i == 3 else 0.01)
+        if i == 5:
+            raise ValueError(f"item {i} failed")
+        return i
+    
+    try:
+        async for _ in amap(flaky, range(100), concurrency=5, timeout=0.1):
+            pass
+    except (ValueError, asyncio.TimeoutError) as exc:
+        print(f"  Stopped on first error ({type(exc).__name__}); in-flight tasks cancelled")
+    
+    # 20,000 items: tasks alive never exceed the concurrency limit
+    peak = 0
+    async def tracked(i):
+        nonlocal peak
+        peak = max(peak, len(asyncio.all_tasks()) - 1)
+        await asyncio.sleep(0)
+        return i
+    count = 0
+    async for _ in amap(tracked, range(20_000), concurrency=50):
+        count += 1
+    print(f"  Processed {count:,} items with at most {peak} tasks alive")
+
+asyncio.run(stream_apis())
+
+print()  # Empty line
+
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
@@ -350,6 +1180,12 @@ print("  - Async API clients")
 print("  - Task queues with workers")
 print("  - Monitoring and logging")
 print("  - Batch processing")
+print("  - Priority task queues with futures and backpressure")
+print("  - Shared memory for zero-copy parallel reductions")
+print("  - Adaptive batch sizing toward a target latency")
+print("  - Fixed worker pools instead of a thread per request")
+print("  - Sharded per-thread counters and histograms for hot metrics")
+print("  - Bounded async map that streams results")
 print("  - Choose concurrency model based on task type")
 print("=" * 60)
 
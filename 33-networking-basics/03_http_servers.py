@@ -4,8 +4,13 @@ HTTP Servers in Python
 This file demonstrates how to create HTTP servers in Python.
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http import HTTPStatus
+from http.server import HTTPServer, ThreadingHTTPServer, BaseHTTPRequestHandler
+import http.client
 import json
+import re
+import threading
+import time
 
 # ============================================================================
 # 1. WHAT IS AN HTTP SERVER?
@@ -307,6 +312,240 @@ print("            # Serve static files")
 print()  # Empty line
 
 
+# ============================================================================
+# 9. KEEP-ALIVE JSON API SERVER WITH A ROUTING TABLE
+# ============================================================================
+print("=" * 60)
+print("9. KEEP-ALIVE JSON API SERVER WITH A ROUTING TABLE")
+print("=" * 60)
+
+class Router:
+    """Routing table compiled once, before the server starts.
+
+    Static paths are looked up in a dict; paths with parameters such as
+    ``/api/users/{user_id:int}`` are compiled to regular expressions and
+    tried in registration order.
+    """
+    
+    CONVERTERS = {'int': (r'\d+', int), 'str': (r'[^/]+', str)}
+    
+    def __init__(self):
+        self.static = {}   # (method, path) -> handler
+        self.dynamic = []  # (method, regex, converters, handler)
+    
+    def route(self, method, pattern):
+        def decorator(handler):
+            if '{' not in pattern:
+                self.static[(method, pattern)] = handler
+                return handler
+            converters = {}
+            def replace(match):
+                name, _, kind = match.group(1).partition(':')
+                regex, convert = self.CONVERTERS[kind or 'str']
+                converters[name] = convert
+                return f'(?P<{name}>{regex})'
+            regex = re.compile('^' + re.sub(r'\{([^}]+)\}', replace, pattern) + '$')
+            self.dynamic.append((method, regex, converters, handler))
+            return handler
+        return decorator
+    
+    def match(self, method, path):
+        handler = self.static.get((method, path))
+        if handler is not None:
+            return handler, {}
+        for route_method, regex, converters, handler in self.dynamic:
+            if route_method == method:
+                found = regex.match(path)
+                if found:
+                    return handler, {k: converters[k](v) for k, v in found.groupdict().items()}
+        return None, None
+    
+    def allowed_methods(self, path):
+        """Methods registered for path (used to answer 405 vs 404)"""
+        methods = {method for method, route_path in self.static if route_path == path}
+        methods.update(method for method, regex, _, _ in self.dynamic if regex.match(path))
+        return sorted(methods)
+
+api = Router()
+USERS = {1: {'id': 1, 'name': 'Alice'}, 2: {'id': 2, 'name': 'Bob'}}
+USERS_LOCK = threading.Lock()  # Handlers run on many threads at once
+
+@api.route('GET', '/api/users')
+def list_users(request, body):
+    return 200, list(USERS.values())
+
+@api.route('GET', '/api/users/{user_id:int}')
+def get_user(request, body, user_id):
+    user = USERS.get(user_id)
+    return (200, user) if user else (404, {'error': 'Not found'})
+
+@api.route('POST', '/api/users')
+def create_user(request, body):
+    data = json.loads(body or b'{}')
+    if not isinstance(data, dict):
+        return 400, {'error': 'Expected a JSON object'}
+    with USERS_LOCK:
+        user = {'id': max(USERS) + 1, 'name': data.get('name', 'Unknown')}
+        USERS[user['id']] = user
+    return 201, user
+
+def _encoded_headers(status):
+    """Status line and fixed headers, encoded once per status code"""
+    reason = HTTPStatus(status).phrase
+    return (f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json\r\n"
+            "Server: KeepAliveAPI\r\n").encode('latin-1')
+
+RESPONSE_HEADERS = {status: _encoded_headers(status) for status in (200, 201, 400, 404, 405, 500)}
+
+class KeepAliveAPIHandler(BaseHTTPRequestHandler):
+    """JSON API handler speaking HTTP/1.1 with persistent connections.
+
+    Every response carries Content-Length, so clients can send the next
+    request on the same connection. The status line and fixed headers
+    are pre-encoded bytes and each response goes out in a single write.
+    """
+    
+    protocol_version = 'HTTP/1.1'
+    router = api
+    
+    def _dispatch(self, method):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            # The body can't be framed, so the rest of the stream is unusable
+            self.close_connection = True
+            self._send_json(400, {'error': 'Invalid Content-Length'})
+            return
+        body = self.rfile.read(length) if length else b''
+        path = self.path.split('?', 1)[0]
+        handler, params = self.router.match(method, path)
+        extra_headers = b""
+        if handler is None:
+            allowed = self.router.allowed_methods(path)
+            if allowed:
+                status, data = 405, {'error': 'Method not allowed'}
+                extra_headers = f"Allow: {', '.join(allowed)}\r\n".encode('latin-1')
+            else:
+                status, data = 404, {'error': 'Not found'}
+        else:
+            try:
+                status, data = handler(self, body, **params)
+            except ValueError as e:  # Includes malformed JSON
+                status, data = 400, {'error': str(e)}
+            except Exception as e:
+                status, data = 500, {'error': str(e)}
+        self._send_json(status, data, extra_headers)
+    
+    def _send_json(self, status, data, extra_headers=b""):
+        payload = json.dumps(data).encode()
+        head = RESPONSE_HEADERS.get(status) or _encoded_headers(status)
+        if self.close_connection:
+            extra_headers += b"Connection: close\r\n"
+        self.wfile.write(head + extra_headers + b"Content-Length: %d\r\n\r\n" % len(payload)
+                         + payload)
+    
+    def do_GET(self):
+        self._dispatch('GET')
+    
+    def do_POST(self):
+        self._dispatch('POST')
+    
+    def log_message(self, format, *args):
+        pass
+
+def start_server(server_class, handler_class):
+    server = server_class(('127.0.0.1', 0), handler_class)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+def benchmark_server(port, keep_alive, num_clients=4, requests_per_client=300):
+    """Hit GET /api/users/1 from several threads; returns (req/s, p99 ms)"""
+    latencies = []
+    lock = threading.Lock()
+    
+    def client():
+        local = []
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            if not keep_alive:
+                conn.close()  # Old handler closes after each response anyway
+            conn.request('GET', '/api/users/1')
+            response = conn.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+    
+    threads = [threading.Thread(target=client) for _ in range(num_clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+server, server_thread = start_server(ThreadingHTTPServer, KeepAliveAPIHandler)
+port = server.server_address[1]
+conn = http.client.HTTPConnection('127.0.0.1', port)
+for method, path, body in [('GET', '/api/users', None), ('GET', '/api/users/2', None),
+                           ('POST', '/api/users', json.dumps({'name': 'Carol'})),
+                           ('POST', '/api/users', '[]'),
+                           ('POST', '/api/users/2', None),
+                           ('GET', '/api/users/99', None)]:
+    conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    print(f"  {method} {path}: {response.status} {response.read().decode()}")
+conn.close()
+print("  (All six requests used one TCP connection)")
+
+# A malformed Content-Length gets a 400 and the connection is closed
+conn = http.client.HTTPConnection('127.0.0.1', port)
+conn.putrequest('POST', '/api/users')
+conn.putheader('Content-Length', 'abc')
+conn.endheaders()
+response = conn.getresponse()
+print(f"  POST with Content-Length: abc -> {response.status} {response.read().decode()} "
+      f"(Connection: {response.getheader('Connection')})")
+conn.close()
+
+# Concurrent creates must each get their own id
+def create_many(count):
+    client = http.client.HTTPConnection('127.0.0.1', port)
+    for _ in range(count):
+        client.request('POST', '/api/users', body='{"name": "load"}')
+        client.getresponse().read()
+    client.close()
+
+creators = [threading.Thread(target=create_many, args=(50,)) for _ in range(8)]
+for t in creators:
+    t.start()
+for t in creators:
+    t.join()
+print(f"  8 threads x 50 POSTs -> {len(USERS) - 3} new users (expected 400)")
+
+old_server, old_thread = start_server(HTTPServer, APIHandler)
+old_rate, old_p99 = benchmark_server(old_server.server_address[1], keep_alive=False)
+new_rate, new_p99 = benchmark_server(port, keep_alive=True)
+for running in (old_server, server):
+    running.shutdown()
+    running.server_close()
+
+print("\n  4 clients x 300 requests to GET /api/users/1:")
+print(f"    APIHandler (HTTPServer, close per request): {old_rate:7,.0f} req/s, p99 {old_p99:6.2f} ms")
+print(f"    KeepAliveAPIHandler (threaded, keep-alive): {new_rate:7,.0f} req/s, p99 {new_p99:6.2f} ms")
+
+print()  # Empty line
+
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
@@ -322,5 +561,6 @@ print("  - Return appropriate status codes")
 print("  - Handle errors gracefully")
 print("  - Use JSON for API responses")
 print("  - Serve static files when needed")
+print("  - Route tables, threading and keep-alive for throughput")
 print("=" * 60)
 
@@ -157,25 +157,94 @@ print("=" * 60)
 print("5. RATE LIMITING")
 print("=" * 60)
 
+import asyncio
+import threading
 import time
 
+class TokenBucket:
+    """Thread-safe O(1) token bucket usable from threads and from asyncio.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``
+    (the allowed burst, default ``rate``). ``acquire`` reserves its tokens
+    under the lock, letting the balance go negative, and then sleeps
+    *outside* the lock for exactly as long as the debt takes to refill,
+    so callers are served in the order they reserved. A caller that is
+    cancelled or interrupted while waiting gives its tokens back.
+    """
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def _check(self, n):
+        if n > self.capacity:
+            raise ValueError(f"Cannot acquire {n} tokens; capacity is {self.capacity}")
+    
+    def _reserve(self, n):
+        """Take n tokens (possibly into debt); return seconds to wait"""
+        self._check(n)
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= n
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+    
+    def _refund(self, n):
+        """Give back tokens reserved by a caller that stopped waiting"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + n)
+    
+    def try_acquire(self, n=1):
+        """Take n tokens if available right now; never blocks"""
+        self._check(n)
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= n:
+                self.tokens -= n
+                return True
+            return False
+    
+    def acquire(self, n=1):
+        """Block the calling thread until n tokens are granted.
+        Returns the number of seconds waited."""
+        wait = self._reserve(n)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            except BaseException:
+                self._refund(n)
+                raise
+        return wait
+    
+    async def acquire_async(self, n=1):
+        """Asyncio front-end: yields to the event loop instead of blocking"""
+        wait = self._reserve(n)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._refund(n)
+                raise
+        return wait
+
 class RateLimitedClient:
     """API client with rate limiting"""
-    def __init__(self, requests_per_second=10):
+    def __init__(self, requests_per_second=10, burst=1):
         self.requests_per_second = requests_per_second
-        self.min_interval = 1.0 / requests_per_second
-        self.last_request_time = 0
+        self.bucket = TokenBucket(rate=requests_per_second, capacity=burst)
     
     def request(self, method, url, **kwargs):
         """Make request with rate limiting"""
-        # Wait if necessary
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_interval:
-            sleep_time = self.min_interval - elapsed
-            print(f"    Rate limiting: waiting {sleep_time:.2f}s")
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+        waited = self.bucket.acquire()
+        if waited > 0:
+            print(f"    Rate limiting: waited {waited:.2f}s")
         print(f"    {method} {url}")
         return {"status": "success"}
 
@@ -4,9 +4,20 @@ Practical Networking Examples
 This file demonstrates real-world networking scenarios.
 """
 
+import asyncio
+import errno
+import random
 import socket
 import time
 import json
+import selectors
+import struct
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # ============================================================================
 # 1. SIMPLE CHAT SERVER
@@ -302,6 +313,983 @@ print("    Use responsibly and only on systems you own!")
 print()  # Empty line
 
 
+# ============================================================================
+# 9. EVENT-LOOP CHAT SERVER WITH SELECTORS
+# ============================================================================
+print("=" * 60)
+print("9. EVENT-LOOP CHAT SERVER WITH SELECTORS")
+print("=" * 60)
+
+FRAME_HEADER = struct.Struct('!I')  # 4-byte big-endian payload length
+
+class Connection:
+    """Per-client state: socket plus read and write buffers"""
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.want_write = False
+
+class SelectorServer:
+    """Single-threaded TCP server built on ``selectors``.
+
+    Every socket is non-blocking. Incoming bytes are buffered per
+    connection and split into length-prefixed frames; each complete frame
+    is passed to ``on_message(server, conn, payload)``. Outgoing frames
+    are queued in the connection's write buffer and flushed when the
+    socket is writable, so a slow client never blocks the others. A
+    client whose unsent output would exceed ``max_outbuf`` bytes is
+    disconnected rather than buffered without limit.
+    """
+    
+    def __init__(self, host='127.0.0.1', port=0, on_message=None,
+                 max_frame=1 << 20, max_outbuf=4 << 20, backlog=1024):
+        self.on_message = on_message or (lambda server, conn, payload: None)
+        self.max_frame = max_frame
+        self.max_outbuf = max_outbuf
+        self.selector = selectors.DefaultSelector()
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((host, port))
+        self.listener.listen(backlog)
+        self.listener.setblocking(False)
+        self.address = self.listener.getsockname()
+        self.selector.register(self.listener, selectors.EVENT_READ, None)
+        self.connections = set()
+        self.peak_connections = 0
+        self.messages_in = 0
+        self.slow_disconnects = 0
+        self.running = False
+    
+    def _accept(self):
+        while True:
+            try:
+                sock, address = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = Connection(sock, address)
+            self.connections.add(conn)
+            self.peak_connections = max(self.peak_connections, len(self.connections))
+            self.selector.register(sock, selectors.EVENT_READ, conn)
+    
+    def _read(self, conn):
+        try:
+            data = conn.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.close(conn)
+            return
+        conn.inbuf += data
+        offset = 0
+        while len(conn.inbuf) - offset >= FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack_from(conn.inbuf, offset)
+            if length > self.max_frame:
+                self.close(conn)
+                return
+            end = offset + FRAME_HEADER.size + length
+            if len(conn.inbuf) < end:
+                break
+            payload = bytes(conn.inbuf[offset + FRAME_HEADER.size:end])
+            offset = end
+            self.messages_in += 1
+            self.on_message(self, conn, payload)
+            if conn not in self.connections:
+                return
+        del conn.inbuf[:offset]
+    
+    def _flush(self, conn):
+        try:
+            sent = conn.sock.send(conn.outbuf)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self.close(conn)
+            return
+        del conn.outbuf[:sent]
+        # Only ask for write events while there is something left to send
+        if conn.outbuf and not conn.want_write:
+            conn.want_write = True
+            self.selector.modify(conn.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, conn)
+        elif not conn.outbuf and conn.want_write:
+            conn.want_write = False
+            self.selector.modify(conn.sock, selectors.EVENT_READ, conn)
+    
+    def _queue(self, conn, frame):
+        if len(conn.outbuf) + len(frame) > self.max_outbuf:
+            self.slow_disconnects += 1  # Not reading fast enough
+            self.close(conn)
+            return
+        conn.outbuf += frame
+        if not conn.want_write:
+            self._flush(conn)
+    
+    def send(self, conn, payload):
+        """Queue one framed message and try to send it right away"""
+        self._queue(conn, FRAME_HEADER.pack(len(payload)) + payload)
+    
+    def broadcast(self, payload, exclude=None):
+        frame = FRAME_HEADER.pack(len(payload)) + payload
+        for conn in list(self.connections):
+            if conn is not exclude:
+                self._queue(conn, frame)
+    
+    def close(self, conn):
+        if conn in self.connections:
+            self.connections.discard(conn)
+            self.selector.unregister(conn.sock)
+            conn.sock.close()
+    
+    def poll(self, timeout=None):
+        for key, events in self.selector.select(timeout):
+            if key.data is None:
+                self._accept()
+                continue
+            conn = key.data
+            if events & selectors.EVENT_READ:
+                self._read(conn)
+            if events & selectors.EVENT_WRITE and conn in self.connections:
+                self._flush(conn)
+    
+    def serve_forever(self, poll_interval=0.1):
+        self.running = True
+        while self.running:
+            self.poll(poll_interval)
+        for conn in list(self.connections):
+            self.close(conn)
+        self.selector.close()
+        self.listener.close()
+
+def chat_handler(server, conn, payload):
+    """Relay every chat message to all other clients"""
+    server.broadcast(f"{conn.address[1]}: ".encode() + payload, exclude=conn)
+
+def echo_handler(server, conn, payload):
+    server.send(conn, payload)
+
+def send_frame(sock, payload):
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+def _recv_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed mid-frame")
+        data += chunk
+    return data
+
+def recv_frame(sock):
+    (length,) = FRAME_HEADER.unpack(_recv_exactly(sock, FRAME_HEADER.size))
+    return _recv_exactly(sock, length)
+
+def start_in_thread(server):
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    return thread
+
+chat_server = SelectorServer(on_message=chat_handler)
+chat_thread = start_in_thread(chat_server)
+chat_clients = [socket.create_connection(chat_server.address) for _ in range(3)]
+time.sleep(0.1)  # Let the server accept everyone
+send_frame(chat_clients[0], b'hello everyone')
+for i, chat_client in enumerate(chat_clients[1:], start=1):
+    chat_client.settimeout(2)
+    print(f"  Client {i} received: {recv_frame(chat_client).decode()!r}")
+
+# A client that never reads is cut off once 64 KB of output backs up
+slow_server = SelectorServer(on_message=chat_handler, max_outbuf=64 * 1024)
+slow_thread = start_in_thread(slow_server)
+slow_reader = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+slow_reader.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+slow_reader.connect(slow_server.address)
+chatty = socket.create_connection(slow_server.address)
+time.sleep(0.1)
+for _ in range(1000):
+    send_frame(chatty, b'y' * 8192)
+time.sleep(0.2)
+print(f"  Slow consumers disconnected: {slow_server.slow_disconnects} "
+      f"(open connections: {len(slow_server.connections)})")
+slow_reader.settimeout(2)
+try:
+    while True:
+        recv_frame(slow_reader)
+except ConnectionError as e:
+    print(f"  Slow client sees: {e}")
+
+for sock in chat_clients + [slow_reader, chatty]:
+    sock.close()
+for server, thread in ((chat_server, chat_thread), (slow_server, slow_thread)):
+    server.running = False
+    thread.join()
+
+def load_test(address, num_clients, messages_per_client=3, payload=b'x' * 64):
+    """Open num_clients non-blocking connections from one thread and have
+    each do request/response round trips; returns (peak open, msgs/sec)"""
+    selector = selectors.DefaultSelector()
+    frame = FRAME_HEADER.pack(len(payload)) + payload
+    remaining = {}
+    for _ in range(num_clients):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        sock.connect_ex(address)
+        remaining[sock] = messages_per_client
+        selector.register(sock, selectors.EVENT_WRITE, bytearray())
+    held = connected = 0
+    completed = 0
+    start = time.perf_counter()
+    while remaining:
+        for key, events in selector.select(5):
+            sock, buf = key.fileobj, key.data
+            if events & selectors.EVENT_WRITE:
+                # Connected: send the first request and wait for replies
+                connected += 1
+                held = max(held, connected)
+                sock.send(frame)
+                selector.modify(sock, selectors.EVENT_READ, buf)
+                continue
+            data = sock.recv(65536)
+            if not data:
+                raise ConnectionError("server closed the connection")
+            buf += data
+            while len(buf) >= len(frame):
+                del buf[:len(frame)]
+                completed += 1
+                remaining[sock] -= 1
+                if remaining[sock]:
+                    sock.send(frame)
+            if not remaining[sock]:
+                del remaining[sock]
+                selector.unregister(sock)
+                sock.close()
+                connected -= 1
+    elapsed = time.perf_counter() - start
+    selector.close()
+    return held, completed / elapsed
+
+# Each connection uses two descriptors here (client and server side)
+try:
+    import resource
+    fd_limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+except ImportError:  # Not available on Windows
+    fd_limit = 1024
+num_clients = max(1, min(10_000, (fd_limit - 200) // 2))
+
+echo_server = SelectorServer(on_message=echo_handler, backlog=4096)
+echo_thread = start_in_thread(echo_server)
+_, rate = load_test(echo_server.address, num_clients)
+echo_server.running = False
+echo_thread.join()
+print(f"\n  Load test with {num_clients:,} clients on one server thread:")
+print(f"    Connections held at once: {echo_server.peak_connections:,}")
+print(f"    Echo round trips: {echo_server.messages_in:,} at {rate:,.0f} msgs/sec")
+
+print()  # Empty line
+
+
+# ============================================================================
+# 10. STALE-WHILE-REVALIDATE API CACHE
+# ============================================================================
+print("=" * 60)
+print("10. STALE-WHILE-REVALIDATE API CACHE")
+print("=" * 60)
+
+class APIError(Exception):
+    """Request failure; ``status`` is None for network errors"""
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class CacheEntry:
+    __slots__ = ('data', 'etag', 'error', 'fetched_at', 'retry_after')
+    
+    def __init__(self, data=None, etag=None, error=None):
+        self.data = data
+        self.etag = etag
+        self.error = error  # (message, status) summary, never a live exception
+        self.fetched_at = time.monotonic()
+        self.retry_after = 0.0  # Earliest next background refresh
+
+class SWRCachedAPIClient:
+    """JSON API client with a bounded stale-while-revalidate cache.
+
+    - Entries younger than ``ttl`` are served directly.
+    - Entries up to ``stale_ttl`` seconds past that are served immediately
+      while one background thread refreshes them.
+    - Concurrent misses for the same endpoint share a single request.
+    - Refreshes send ``If-None-Match`` and a 304 just renews the entry.
+    - A failed background refresh keeps the stale entry (stale-if-error)
+      and waits ``negative_ttl`` seconds before trying again.
+    - Other failures are cached for ``negative_ttl`` seconds and raised
+      as a fresh ``APIError``, so a broken endpoint isn't hammered by
+      every caller.
+    """
+    
+    def __init__(self, base_url, ttl=60, stale_ttl=300, negative_ttl=5,
+                 max_entries=1000, timeout=5):
+        self.base_url = base_url.rstrip('/')
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.in_flight = {}  # endpoint -> Event set when the fetch finishes
+        self.stats = Counter()
+    
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+    
+    def _lookup(self, endpoint):
+        with self.lock:
+            entry = self.cache.get(endpoint)
+            if entry is not None:
+                self.cache.move_to_end(endpoint)
+            return entry
+    
+    def _store(self, endpoint, entry):
+        with self.lock:
+            self.cache[endpoint] = entry
+            self.cache.move_to_end(endpoint)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+                self.stats['evictions'] += 1
+    
+    def _fetch(self, endpoint, previous, background=False):
+        """One HTTP request, conditional if we already hold an ETag"""
+        headers = {'Accept': 'application/json'}
+        if previous is not None and previous.etag and previous.error is None:
+            headers['If-None-Match'] = previous.etag
+        request = urllib.request.Request(self.base_url + endpoint, headers=headers)
+        self._count('requests')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                entry = CacheEntry(json.loads(response.read()), response.headers.get('ETag'))
+        except urllib.error.HTTPError as e:
+            e.close()  # Don't keep the error's response open in the cache
+            if e.code == 304:
+                self._count('not_modified')
+                entry = CacheEntry(previous.data, previous.etag)
+            else:
+                entry = CacheEntry(error=(f"HTTP {e.code} {e.reason}", e.code))
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            entry = CacheEntry(error=(f"{type(e).__name__}: {e}", None))
+        if entry.error is not None and background:
+            # Stale-if-error: keep serving what we have, retry later
+            self._count('refresh_errors')
+            previous.retry_after = time.monotonic() + self.negative_ttl
+            return previous
+        self._store(endpoint, entry)
+        return entry
+    
+    def _start_fetch(self, endpoint):
+        """Register as the fetcher for endpoint; returns (event, is_leader)"""
+        with self.lock:
+            event = self.in_flight.get(endpoint)
+            if event is not None:
+                return event, False
+            event = self.in_flight[endpoint] = threading.Event()
+            return event, True
+    
+    def _finish_fetch(self, endpoint, event):
+        with self.lock:
+            del self.in_flight[endpoint]
+        event.set()
+    
+    def _refresh(self, endpoint, previous, event):
+        try:
+            self._fetch(endpoint, previous, background=True)
+        finally:
+            self._finish_fetch(endpoint, event)
+    
+    def _result(self, entry):
+        if entry.error is not None:
+            raise APIError(*entry.error)
+        return entry.data
+    
+    def get(self, endpoint):
+        entry = self._lookup(endpoint)
+        if entry is not None:
+            now = time.monotonic()
+            age = now - entry.fetched_at
+            if entry.error is not None:
+                if age < self.negative_ttl:
+                    self._count('negative_hits')
+                    return self._result(entry)
+            elif age < self.ttl:
+                self._count('fresh_hits')
+                return entry.data
+            elif age < self.ttl + self.stale_ttl:
+                self._count('stale_hits')
+                if now >= entry.retry_after:
+                    event, leader = self._start_fetch(endpoint)
+                    if leader:
+                        threading.Thread(target=self._refresh, args=(endpoint, entry, event),
+                                         daemon=True).start()
+                return entry.data
+        
+        event, leader = self._start_fetch(endpoint)
+        if not leader:
+            self._count('coalesced')
+            event.wait(self.timeout)
+            latest = self._lookup(endpoint)
+            if latest is not None and latest is not entry:
+                return self._result(latest)
+            return self.get(endpoint)
+        try:
+            self._count('misses')
+            return self._result(self._fetch(endpoint, entry))
+        finally:
+            self._finish_fetch(endpoint, event)
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """Local stand-in API: versioned JSON with ETags, plus a failing route"""
+    protocol_version = 'HTTP/1.1'
+    version = 1
+    hits = Counter()
+    outage = False  # When set, every route fails
+    
+    def do_GET(self):
+        StubAPIHandler.hits[self.path] += 1
+        time.sleep(0.05)  # Simulated backend latency
+        if self.path == '/api/broken' or StubAPIHandler.outage:
+            self._reply(500, b'{"error": "backend down"}')
+            return
+        etag = f'"v{StubAPIHandler.version}"'
+        if self.headers.get('If-None-Match') == etag:
+            self._reply(304, b'', etag)
+            return
+        body = json.dumps({'path': self.path, 'version': StubAPIHandler.version}).encode()
+        self._reply(200, body, etag)
+    
+    def _reply(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+stub_server = ThreadingHTTPServer(('127.0.0.1', 0), StubAPIHandler)
+stub_server.daemon_threads = True
+threading.Thread(target=stub_server.serve_forever, daemon=True).start()
+swr_client = SWRCachedAPIClient(f"http://127.0.0.1:{stub_server.server_address[1]}",
+                                ttl=0.2, stale_ttl=5, negative_ttl=0.5, max_entries=2)
+
+# 10 concurrent misses for the same endpoint -> one backend request
+callers = [threading.Thread(target=swr_client.get, args=('/api/users',)) for _ in range(10)]
+for t in callers:
+    t.start()
+for t in callers:
+    t.join()
+print(f"  10 concurrent misses -> backend hits: {StubAPIHandler.hits['/api/users']}")
+
+time.sleep(0.25)  # Entry is now stale
+start = time.perf_counter()
+stale = swr_client.get('/api/users')
+print(f"  Stale read served in {(time.perf_counter() - start) * 1000:.1f} ms "
+      f"(version {stale['version']}), refreshing in background")
+time.sleep(0.1)
+print(f"  Background revalidation answered 304: {swr_client.stats['not_modified']} time(s)")
+
+StubAPIHandler.version = 2
+time.sleep(0.25)
+swr_client.get('/api/users')  # Stale: triggers refresh with the old ETag
+time.sleep(0.1)
+print(f"  After the backend changed: version {swr_client.get('/api/users')['version']}")
+
+StubAPIHandler.outage = True
+time.sleep(0.25)
+served = []
+for _ in range(5):  # Refresh fails in the background; stale data keeps flowing
+    served.append(swr_client.get('/api/users')['version'])
+    time.sleep(0.05)
+StubAPIHandler.outage = False
+print(f"  During an outage, stale reads still served versions {served} "
+      f"(failed refreshes: {swr_client.stats['refresh_errors']})")
+
+for _ in range(3):
+    try:
+        swr_client.get('/api/broken')
+    except APIError as e:
+        broken_error = e
+print(f"  3 calls to a failing endpoint -> backend hits: {StubAPIHandler.hits['/api/broken']} "
+      f"(negative cache hits: {swr_client.stats['negative_hits']}, error: {broken_error})")
+
+for endpoint in ('/api/a', '/api/b', '/api/c'):
+    swr_client.get(endpoint)
+print(f"  Bounded to {swr_client.max_entries} entries: {list(swr_client.cache)}")
+print(f"  Stats: {dict(swr_client.stats)}")
+
+stub_server.shutdown()
+stub_server.server_close()
+
+print()  # Empty line
+
+
+# ============================================================================
+# 11. CONCURRENT API HEALTH MONITOR
+# ============================================================================
+print("=" * 60)
+print("11. CONCURRENT API HEALTH MONITOR")
+print("=" * 60)
+
+class AsyncConnectionPool:
+    """Keep-alive HTTP/1.1 connections reused across checks, per origin"""
+    
+    DEFAULT_PORTS = {'http': 80, 'https': 443}
+    
+    def __init__(self, max_idle_per_host=20):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle = {}  # (scheme, host, port) -> [(reader, writer), ...]
+        self.opened = 0
+    
+    async def acquire(self, origin):
+        idle = self.idle.get(origin, [])
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+        scheme, host, port = origin
+        self.opened += 1
+        return await asyncio.open_connection(host, port, ssl=(scheme == 'https') or None)
+    
+    def release(self, origin, conn, reusable):
+        idle = self.idle.setdefault(origin, [])
+        if reusable and len(idle) < self.max_idle_per_host:
+            idle.append(conn)
+        else:
+            conn[1].close()
+    
+    def close(self):
+        for idle in self.idle.values():
+            for _, writer in idle:
+                writer.close()
+        self.idle.clear()
+    
+    async def get(self, url):
+        """Minimal GET returning the status code; the body is discarded"""
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in self.DEFAULT_PORTS:
+            raise ValueError(f"Unsupported URL scheme: {parts.scheme!r}")
+        port = parts.port or self.DEFAULT_PORTS[parts.scheme]
+        origin = (parts.scheme, parts.hostname, port)
+        target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        host = parts.netloc.rpartition('@')[2]  # Host header keeps a non-default port
+        conn = await self.acquire(origin)
+        reusable = False
+        try:
+            reader, writer = conn
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            status_line, *header_lines = head.decode('latin-1').split('\r\n')
+            headers = {}
+            for line in header_lines:
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+            # Only a Content-Length body can be drained exactly; chunked or
+            # close-delimited bodies would leave bytes for the next check
+            if 'content-length' in headers and 'transfer-encoding' not in headers:
+                await reader.readexactly(int(headers['content-length']))
+                reusable = headers.get('connection', '').lower() != 'close'
+            return int(status_line.split()[1])
+        finally:
+            # A cancelled or failed check leaves the stream in an unknown state
+            self.release(origin, conn, reusable)
+
+class EndpointHealth:
+    """Rolling window of recent checks for one endpoint"""
+    
+    def __init__(self, window=100):
+        self.samples = deque(maxlen=window)  # (ok, latency_seconds)
+        self.last_error = None
+    
+    def record(self, ok, latency, error=None):
+        self.samples.append((ok, latency))
+        if error is not None:
+            self.last_error = error
+    
+    def summary(self):
+        latencies = sorted(latency for ok, latency in self.samples if ok)
+        
+        def pct(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+        
+        checks = len(self.samples)
+        up = sum(1 for ok, _ in self.samples if ok)
+        return {
+            'checks': checks,
+            'availability': up / checks if checks else None,
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'p99_ms': pct(0.99),
+            'last_error': self.last_error,
+        }
+
+class AsyncAPIMonitor:
+    """Concurrent version of APIMonitor.
+
+    At most ``concurrency`` checks run at once, each bounded by its
+    endpoint's timeout. In scheduled mode every endpoint is checked every
+    ``interval`` seconds, jittered so checks don't arrive in bursts.
+    """
+    
+    def __init__(self, endpoints, interval=30, jitter=0.1, concurrency=50,
+                 timeout=5, timeouts=None, window=100):
+        self.endpoints = endpoints
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.health = {endpoint: EndpointHealth(window) for endpoint in endpoints}
+        self.pool = AsyncConnectionPool(max_idle_per_host=concurrency)
+        self.semaphore = None
+    
+    async def check_endpoint(self, endpoint):
+        timeout = self.timeouts.get(endpoint, self.timeout)
+        async with self.semaphore:
+            start = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(self.pool.get(endpoint), timeout)
+            except asyncio.TimeoutError:
+                ok, error = False, f"timeout after {timeout}s"
+            except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                ok, error = False, f"{type(e).__name__}: {e}"
+            else:
+                ok, error = status == 200, None if status == 200 else f"HTTP {status}"
+            latency = time.perf_counter() - start
+        self.health[endpoint].record(ok, latency, error)
+        return ok
+    
+    def _next_delay(self):
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+    
+    async def _schedule(self, endpoint, deadline):
+        loop = asyncio.get_running_loop()
+        # Random initial offset spreads the first round across the interval
+        await asyncio.sleep(random.uniform(0, self.interval))
+        while loop.time() < deadline:
+            await self.check_endpoint(endpoint)
+            await asyncio.sleep(self._next_delay())
+    
+    async def run_once(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            await asyncio.gather(*(self.check_endpoint(e) for e in self.endpoints))
+        finally:
+            self.pool.close()
+    
+    async def run(self, duration):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        deadline = asyncio.get_running_loop().time() + duration
+        try:
+            await asyncio.gather(*(self._schedule(e, deadline) for e in self.endpoints))
+        finally:
+            self.pool.close()
+    
+    def get_stats(self):
+        """Totals in the same shape as APIMonitor, plus per-endpoint detail"""
+        endpoints = {endpoint: h.summary() for endpoint, h in self.health.items()}
+        healthy = sum(1 for h in self.health.values() if h.samples and h.samples[-1][0])
+        return {
+            'total': len(endpoints),
+            'healthy': healthy,
+            'down': len(endpoints) - healthy,
+            'endpoints': endpoints,
+        }
+
+class FlakyAPIHandler(BaseHTTPRequestHandler):
+    """Local stand-in API that injects latency and failures by path"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+    connections = 0
+    
+    def setup(self):
+        super().setup()
+        FlakyAPIHandler.connections += 1
+    
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            time.sleep(0.3)
+        elif self.path.startswith('/flaky') and random.random() < 0.3:
+            self._reply(503)
+            return
+        elif self.path.startswith('/chunked'):
+            self._reply_chunked()
+            return
+        else:
+            time.sleep(random.uniform(0.005, 0.02))
+        self._reply(200)
+    
+    def _reply_chunked(self):
+        """No Content-Length: the client can't reuse this connection"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self.wfile.write(b'10\r\n{"status": "ok"}\r\n0\r\n\r\n')
+    
+    def _reply(self, status):
+        body = b'{"status": "ok"}' if status == 200 else b'{"status": "unavailable"}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Client gave up after its timeout
+    
+    def log_message(self, format, *args):
+        pass
+
+class FlakyAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # The default backlog of 5 drops concurrent connects
+
+flaky_server = FlakyAPIServer(('127.0.0.1', 0), FlakyAPIHandler)
+threading.Thread(target=flaky_server.serve_forever, daemon=True).start()
+base = f"http://127.0.0.1:{flaky_server.server_address[1]}"
+
+# One pass over 500 endpoints: sequential checks would take 500 x ~12 ms
+many = [f"{base}/health/{i}" for i in range(500)]
+fleet_monitor = AsyncAPIMonitor(many, concurrency=50, timeout=2)
+start = time.perf_counter()
+asyncio.run(fleet_monitor.run_once())
+fleet_stats = fleet_monitor.get_stats()
+print(f"  Checked {fleet_stats['total']} endpoints in {time.perf_counter() - start:.2f}s "
+      f"({fleet_stats['healthy']} healthy) over {fleet_monitor.pool.opened} connections")
+
+# Scheduled checks with rolling percentiles and availability
+watched = [f"{base}/users?verbose=1", f"{base}/flaky", f"{base}/slow", f"{base}/chunked",
+           "ftp://127.0.0.1/health"]
+watch_monitor = AsyncAPIMonitor(watched, interval=0.1, jitter=0.2, concurrency=10,
+                                timeout=1, timeouts={f"{base}/slow": 0.2})
+FlakyAPIHandler.connections = 0
+asyncio.run(watch_monitor.run(duration=2))
+watch_stats = watch_monitor.get_stats()
+for endpoint, summary in watch_stats['endpoints'].items():
+    latency = (f"p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms"
+               if summary['p50_ms'] is not None else "no successful checks")
+    print(f"    {endpoint.replace(base, ''):24s} checks={summary['checks']:3d} "
+          f"up={summary['availability']:6.1%} {latency} last_error={summary['last_error']}")
+checks = sum(s['checks'] for s in watch_stats['endpoints'].values())
+print(f"  {checks} checks used {FlakyAPIHandler.connections} TCP connections "
+      f"(timeouts and chunked replies discard theirs)")
+
+flaky_server.shutdown()
+flaky_server.server_close()
+
+print()  # Empty line
+
+
+# ============================================================================
+# 12. ASYNC PORT SCANNER
+# ============================================================================
+print("=" * 60)
+print("12. ASYNC PORT SCANNER")
+print("=" * 60)
+
+class RTTEstimator:
+    """Smoothed RTT and variance, as TCP computes its retransmit timeout"""
+    
+    def __init__(self, initial_timeout=1.0, min_timeout=0.05, max_timeout=1.0):
+        self.srtt = None
+        self.rttvar = None
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+    
+    def observe(self, rtt):
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+    
+    @property
+    def timeout(self):
+        if self.srtt is None:
+            return self.initial_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.srtt + 4 * self.rttvar))
+
+# Routing failures look like a firewall dropping the SYN. Any other OSError
+# (EMFILE, ENOBUFS, ...) is a local problem and says nothing about the port.
+UNREACHABLE_ERRNOS = {errno.EHOSTUNREACH, errno.ENETUNREACH}
+
+class AsyncPortScanner:
+    """Concurrent TCP connect scanner.
+
+    At most ``concurrency`` connects are in flight. Both accepted and
+    refused connects are full round trips, so they feed the RTT estimate
+    that sets the timeout for later probes. Silent ports then cost a few
+    RTTs instead of a fixed second each. Like TCP's SYN retransmits, a
+    silent port is retried with a doubled timeout before it is reported
+    filtered, which absorbs event-loop delay under heavy concurrency.
+    """
+    
+    def __init__(self, concurrency=500, min_timeout=0.05, max_timeout=1.0, retries=2):
+        self.concurrency = concurrency
+        self.retries = retries
+        self.max_timeout = max_timeout
+        self.rtt = RTTEstimator(max_timeout, min_timeout, max_timeout)
+    
+    async def probe(self, host, port):
+        """Returns (port, state, seconds, error) with state open/closed/filtered/error.
+
+        Only a refused connect counts as closed. ``error`` names the errno
+        behind an 'error' or unreachable 'filtered' result, else None.
+        """
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            # Re-read the estimate: it may have tightened while we waited
+            timeout = min(self.max_timeout, self.rtt.timeout * 2 ** attempt)
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                break
+            except asyncio.TimeoutError:
+                pass
+            except ConnectionRefusedError:
+                elapsed = time.perf_counter() - start
+                if attempt == 0:
+                    self.rtt.observe(elapsed)
+                return port, 'closed', elapsed, None
+            except OSError as e:
+                state = 'filtered' if e.errno in UNREACHABLE_ERRNOS else 'error'
+                reason = errno.errorcode.get(e.errno, type(e).__name__)
+                return port, state, time.perf_counter() - start, f"{reason}: {e.strerror or e}"
+        else:
+            return port, 'filtered', time.perf_counter() - start, None
+        elapsed = time.perf_counter() - start
+        if attempt == 0:
+            self.rtt.observe(elapsed)
+        writer.close()
+        return port, 'open', elapsed, None
+    
+    async def scan(self, host, ports):
+        """Async generator yielding results in completion order.
+
+        Tasks are only created once the semaphore admits them, so scanning
+        65k ports never holds more than ``concurrency`` pending probes.
+        Every port yields exactly one result, even if its probe raises.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = asyncio.Queue()
+        pending = set()
+        
+        async def run_probe(port):
+            start = time.perf_counter()
+            try:
+                try:
+                    result = await self.probe(host, port)
+                except Exception as e:  # e.g. OverflowError for port 70000
+                    result = (port, 'error', time.perf_counter() - start,
+                              f"{type(e).__name__}: {e}")
+                await results.put(result)
+            finally:
+                semaphore.release()
+        
+        async def launch():
+            for port in ports:
+                await semaphore.acquire()
+                task = asyncio.create_task(run_probe(port))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        
+        launcher = asyncio.create_task(launch())
+        try:
+            for _ in range(len(ports)):
+                yield await results.get()
+        finally:
+            launcher.cancel()
+            for task in list(pending):
+                task.cancel()
+
+def scan_ports_async(host, ports, concurrency=500):
+    """Drop-in counterpart of scan_ports that prints results as they arrive"""
+    async def main():
+        scanner = AsyncPortScanner(concurrency)
+        found = {'open': [], 'closed': [], 'filtered': [], 'error': []}
+        async for port, state, _, error in scanner.scan(host, ports):
+            if state == 'open':
+                print(f"    Port {port}: OPEN")
+            elif error:
+                print(f"    Port {port}: {state.upper()} ({error})")
+            found[state].append(port)
+        return found
+    return asyncio.run(main())
+
+# Local targets only: some listening ports, some whose accept queue is
+# full (new SYNs are dropped, like a firewalled port), the rest closed.
+open_socks = []
+for _ in range(10):
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(('127.0.0.1', 0))
+    s.listen(128)
+    open_socks.append(s)
+
+filtered_socks, backlog_fillers = [], []
+for _ in range(5):
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(('127.0.0.1', 0))
+    s.listen(0)
+    filtered_socks.append(s)
+    for _ in range(4):  # Never accepted, so the queue stays full
+        c = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        c.setblocking(False)
+        c.connect_ex(s.getsockname())
+        backlog_fillers.append(c)
+time.sleep(0.05)
+
+open_ports = [s.getsockname()[1] for s in open_socks]
+filtered_ports = [s.getsockname()[1] for s in filtered_socks]
+known = set(open_ports) | set(filtered_ports)
+closed_ports = [p for p in range(20000, 25000) if p not in known]
+targets = open_ports + filtered_ports + closed_ports
+random.shuffle(targets)
+
+print(f"  Scanning {len(targets):,} localhost ports "
+      f"({len(open_ports)} listening, {len(filtered_ports)} dropping SYNs)...")
+start = time.perf_counter()
+found = scan_ports_async('127.0.0.1', targets)
+async_time = time.perf_counter() - start
+print(f"  Async scan: {async_time:.2f}s -> open={len(found['open'])}, "
+      f"closed={len(found['closed']):,}, filtered={len(found['filtered'])}, "
+      f"error={len(found['error'])}")
+
+# A probe that fails locally is reported as an error, never as closed
+bad = scan_ports_async('127.0.0.1', [closed_ports[0], 70000, closed_ports[1]])
+print(f"  Out-of-range port: {bad}")
+
+# The sequential scanner pays its full 1s timeout on every silent port
+start = time.perf_counter()
+sequential_open = [port for port in targets if scan_port('127.0.0.1', port)]
+sequential_time = time.perf_counter() - start
+print(f"  Sequential scan_port: {sequential_time:.2f}s -> open={len(sequential_open)} "
+      f"({sequential_time / async_time:.1f}x slower)")
+
+for s in backlog_fillers + filtered_socks + open_socks:
+    s.close()
+
+print()  # Empty line
+
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
@@ -310,12 +1298,16 @@ print("PRACTICAL NETWORKING EXAMPLES SUMMARY:")
 print("=" * 60)
 print("Real-world Patterns:")
 print("  - Chat servers with multiple clients")
+print("  - Single-threaded selectors servers with framed messages")
 print("  - File transfer with progress tracking")
 print("  - API clients for external services")
 print("  - Download managers")
 print("  - API health monitoring")
 print("  - Webhook receivers")
 print("  - API response caching")
+print("  - Stale-while-revalidate caching with request coalescing")
+print("  - Concurrent health checks with latency percentiles")
+print("  - Asyncio port scanning with adaptive timeouts")
 print("  - Network port scanning (use responsibly)")
 print("=" * 60)
 